@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, TextIO
+from engine import Engine, BitBoard, SolveResult, SolverStats, VISUALS
+
+# Puzzles kept in flight per worker, which bounds memory regardless of corpus size
+QUEUE_DEPTH: int = 4
+NON_KEYWORDS: set[str] = {"title", "by", "copyright", "license", "catalogue", "goal", "width", "height", "rows", "columns"}
+# Keywords that begin a puzzle, where reading picks up again after a puzzle it couldn't read
+NON_PUZZLE_STARTS: set[str] = {"title", "width"}
+
+Puzzle = tuple[int, str, list[list[int]], list[list[int]]]
+
+def readJsonLines(stream: TextIO) -> Iterator[Puzzle | tuple[int, str, Exception]]:
+    # One puzzle per line: {"id": ..., "rows": [[...], ...], "cols": [[...], ...]}
+    index: int = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            yield index, str(record.get("id", index)), parseClues(record["rows"]), parseClues(record["cols"])
+        except Exception as error:
+            yield index, str(index), error
+        index += 1
+
+def readNon(stream: TextIO) -> Iterator[Puzzle | tuple[int, str, Exception]]:
+    # Puzzles in the .non format, one after another: keyword lines such as "width 5" and
+    # "height 5", then "rows" and "columns" each followed by one line of comma separated clues per line.
+    # A puzzle with a line that can't be read is dropped as a whole with one error, and reading
+    # carries on from the next title or width line.
+    index: int = 0
+    fields: dict[str, str] = {}
+    rows: list[list[int]] = []
+    cols: list[list[int]] = []
+    section: list[list[int]] | None = None
+    skipping: bool = False
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        keyword: str = line.split(maxsplit = 1)[0].lower()
+        if skipping:
+            if keyword not in NON_PUZZLE_STARTS:
+                continue
+            skipping = False
+        try:
+            if keyword in NON_KEYWORDS:
+                value: str = line[len(keyword):].strip().strip('"')
+                if keyword == "rows":
+                    section = rows
+                elif keyword == "columns":
+                    section = cols
+                else:
+                    section = None
+                    fields[keyword] = value
+                continue
+            if section == None:
+                raise Exception(f"Clue line outside of a rows or columns section: {line}")
+            section.append([int(num) for num in line.replace(",", " ").split()])
+        except Exception as error:
+            yield index, fields.get("title", str(index)), error
+            index += 1
+            fields, rows, cols, section = {}, [], [], None
+            skipping = True
+            continue
+        if "width" in fields and "height" in fields and len(rows) == int(fields["height"]) and len(cols) == int(fields["width"]):
+            yield index, fields.get("title", str(index)), rows, cols
+            index += 1
+            fields, rows, cols, section = {}, [], [], None
+    if rows or cols:
+        yield index, fields.get("title", str(index)), Exception("Incomplete puzzle at end of input")
+
+def parseClues(lines: list[list[int]]) -> list[list[int]]:
+    outList: list[list[int]] = []
+    for nums in lines:
+        outList.append([int(num) for num in nums] or [0])
+    return outList
+
+def solvePuzzle(index: int, puzzleId: str, rowNums: list[list[int]], colNums: list[list[int]], collectStats: bool = False, probeWorkers: int = 1) -> dict:
+    # Runs in a pool worker. Line logic first, then the complete solver if logic gets stuck.
+    start: float = time.perf_counter()
+    result: dict = {"index": index, "id": puzzleId, "status": "contradiction", "solvable": False, "unique": False, "grid": None}
+    stats: SolverStats | None = SolverStats() if collectStats else None
+    with Engine.collectStats(stats):
+        solve: SolveResult = Engine.solveBits(rowNums, colNums, BitBoard(len(colNums), len(rowNums)))
+        if solve.isSolved():
+            result.update(status = "solvable", solvable = True, unique = True, grid = gridText(solve.bits))
+        elif solve.isValid():
+            solutions: list[BitBoard] = Engine.findSolutions(rowNums, colNums, solve.bits, 2, probeWorkers)
+            if len(solutions) == 1:
+                result.update(status = "unique", unique = True, grid = gridText(solutions[0]))
+            elif len(solutions) > 1:
+                result.update(status = "multiple", grid = gridText(solve.bits))
+    result["seconds"] = time.perf_counter() - start
+    if stats != None:
+        result["stats"] = stats.toDict()
+    return result
+
+def gridText(bits: BitBoard) -> list[str]:
+    return ["".join(VISUALS[bits.getTile(x, y)] for x in range(bits.width)) for y in range(bits.height)]
+
+def errorResult(index: int, puzzleId: str, error: BaseException) -> dict:
+    return {"index": index, "id": puzzleId, "status": "error", "error": f"{type(error).__name__}: {error}"}
+
+def solveStream(puzzles: Iterator[Puzzle | tuple[int, str, Exception]], output: TextIO, workers: int, collectStats: bool = False, probeWorkers: int = 1) -> dict[str, int]:
+    # Puzzles are spread over workers, or solved one at a time with each one's probing spread
+    # over probeWorkers
+    counts: dict[str, int] = {}
+    def write(result: dict) -> None:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+
+    if workers <= 1:
+        for puzzle in puzzles:
+            if len(puzzle) == 3:
+                write(errorResult(*puzzle))
+                continue
+            try:
+                write(solvePuzzle(*puzzle, collectStats, probeWorkers))
+            except Exception as error:
+                write(errorResult(puzzle[0], puzzle[1], error))
+        return counts
+
+    pool = ProcessPoolExecutor(max_workers = workers)
+    pending: dict[Future, Puzzle] = {}
+    # Puzzles that were on a pool when a worker died, to be tried again one at a time
+    retries: deque[Puzzle] = deque()
+    isolated: bool = False
+    exhausted: bool = False
+    try:
+        while pending or retries or not exhausted:
+            if retries:
+                if not pending:
+                    puzzle = retries.popleft()
+                    pending[pool.submit(solvePuzzle, *puzzle, collectStats)] = puzzle
+                    isolated = True
+            else:
+                isolated = False
+                while not exhausted and len(pending) < QUEUE_DEPTH * workers:
+                    puzzle = next(puzzles, None)
+                    if puzzle == None:
+                        exhausted = True
+                    elif len(puzzle) == 3:
+                        write(errorResult(*puzzle))
+                    else:
+                        pending[pool.submit(solvePuzzle, *puzzle, collectStats)] = puzzle
+            if not pending:
+                continue
+            done, _ = wait(pending, return_when = FIRST_COMPLETED)
+            crashed: list[Puzzle] = []
+            for future in done:
+                puzzle = pending.pop(future)
+                try:
+                    write(future.result())
+                except BrokenProcessPool as error:
+                    if isolated:
+                        # It broke a pool again with nothing else on it
+                        write(errorResult(puzzle[0], puzzle[1], error))
+                    crashed.append(puzzle)
+                except Exception as error:
+                    write(errorResult(puzzle[0], puzzle[1], error))
+            if crashed:
+                # A worker died and everything still on that pool failed with it. There's no telling
+                # which puzzle did it, so they're all tried again, alone, on a fresh pool.
+                if not isolated:
+                    retries.extend(crashed)
+                    retries.extend(pending.values())
+                pending.clear()
+                pool.shutdown(wait = False, cancel_futures = True)
+                pool = ProcessPoolExecutor(max_workers = workers)
+    finally:
+        pool.shutdown(wait = False, cancel_futures = True)
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Solve a stream of puzzles and write one JSON result per line")
+    parser.add_argument('input', help = "puzzle file, or - for stdin")
+    parser.add_argument('-o', '--output', default = "-", help = "result file, or - for stdout")
+    parser.add_argument('--format', choices = ["jsonl", "non"], default = None, help = "input format, guessed from the file extension by default")
+    parser.add_argument('--workers', default = os.cpu_count() or 1, type = int)
+    parser.add_argument('--stats', action = "store_true", help = "add solver stats to every result")
+    parser.add_argument('--probe-workers', default = 1, type = int, help = "workers probing each big puzzle line logic can't finish, with --workers 1")
+    args = parser.parse_args()
+    if args.workers > 1 and args.probe_workers > 1:
+        parser.error("--probe-workers needs --workers 1")
+
+    inputFormat: str = args.format or ("non" if args.input.endswith(".non") else "jsonl")
+    reader = readNon if inputFormat == "non" else readJsonLines
+    source: TextIO = sys.stdin if args.input == "-" else open(args.input)
+    output: TextIO = sys.stdout if args.output == "-" else open(args.output, "w")
+    started: float = time.perf_counter()
+    try:
+        counts = solveStream(reader(source), output, args.workers, args.stats, args.probe_workers)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    summary: str = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"Solved {sum(counts.values())} puzzles in {time.perf_counter() - started:.2f}s ({summary})", file = sys.stderr)
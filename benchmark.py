@@ -0,0 +1,281 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable
+from engine import Engine, BitBoard, Conflict, STATES
+from linebatch import LineBatch
+from movelog import LoggedGame, MoveLog, RECORD, ACTIONS
+from solvecache import SolveCache
+from testing import TESTBOARD, SOLUTION, COUNTERBOARD, TESTROWS, TESTCOLS
+
+BENCHMARK_PATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark.json")
+RESULTS_VERSION: int = 1
+DEFAULT_SEED: int = 2024
+# A case is flagged when its p50 latency grows by more than this fraction over the previous run
+REGRESSION_THRESHOLD: float = 0.25
+# Peak memory may grow by this much on top of the threshold before it's flagged
+MEMORY_SLACK_KIB: float = 16
+# Rounds over the whole suite; every input keeps its fastest time, which filters out scheduler noise
+REPEAT: int = 5
+# Runs per input under tracemalloc, kept apart from the timed runs it would slow down
+MEMORY_SAMPLES: int = 3
+
+LINE_LENGTHS: list[int] = [5, 15, 25, 50, 100]
+BOARD_SIZES: list[int] = [5, 10, 15, 25, 50, 100]
+BOARD_DENSITIES: list[float] = [0.4, 0.6, 0.8]
+# Share of a replayed game's moves that are mistakes
+REPLAY_MISTAKES: float = 0.02
+# Generating a 100x100 board at the default density takes tens of seconds, so it's timed a little denser
+GENERATE_CASES: list[tuple[int, float]] = [(5, 0.6), (10, 0.6), (15, 0.6), (25, 0.6), (50, 0.6), (100, 0.7)]
+
+# Inputs are (args, kwargs) pairs for the benchmarked function
+Case = tuple[str, Callable, list[tuple[tuple, dict]]]
+
+def randomLine(rng: random.Random, length: int, fillPercent: float, revealPercent: float) -> tuple[list[int], list[int]]:
+    # A line with some of its tiles revealed and the clues of the full line it came from
+    solution: list[int] = [STATES["MINED"] if rng.random() < fillPercent else STATES["FLAGGED"] for _ in range(length)]
+    row: list[int] = [tile if rng.random() < revealPercent else STATES["UNKNOWN"] for tile in solution]
+    return row, Engine.getListNums(solution)
+
+def adversarialLines(length: int) -> list[tuple[list[int], list[int]]]:
+    # Lines with as many clues as fit, which make the most work for the line solver
+    unknown: list[int] = [STATES["UNKNOWN"]] * length
+    lines: list[tuple[list[int], list[int]]] = [
+        (unknown, [1] * ((length + 1) // 2)),
+        (unknown, [1] * max(1, length // 2 - 1)),
+        (unknown, [2] * max(1, (length + 1) // 3 - 1)),
+        (unknown, [1, 2] * max(1, length // 6)),
+    ]
+    # Every fourth tile flagged, with a block for nearly every gap between them
+    pinned: list[int] = [STATES["FLAGGED"] if i % 4 == 1 else STATES["UNKNOWN"] for i in range(length)]
+    lines.append((pinned, [1] * ((length + 3) // 4)))
+    return lines
+
+def randomPuzzle(rng: random.Random, size: int, fillPercent: float) -> tuple[BitBoard, list[list[int]], list[list[int]]]:
+    bits: BitBoard = Engine.randomBits(size, size, fillPercent, rng)
+    return bits, Engine.getListRowNums(bits), Engine.getListColNums(bits)
+
+def randomLoggedGame(rng: random.Random, size: int, fillPercent: float) -> LoggedGame:
+    # Every tile played once in a random order, a few of them wrongly
+    bits, rowNums, colNums = randomPuzzle(rng, size, fillPercent)
+    game = LoggedGame(size, size, SolveCache.fingerprint(rowNums, colNums)[0], bits.colFilled)
+    tiles: list[tuple[int, int]] = [(x, y) for x in range(size) for y in range(size)]
+    rng.shuffle(tiles)
+    for tick, (x, y) in enumerate(tiles):
+        mined: bool = bool(bits.colFilled[x] >> y & 1) != (rng.random() < REPLAY_MISTAKES)
+        game.records += RECORD.pack(tick, x, y, ACTIONS["MINE"] if mined else ACTIONS["FLAG"])
+    return game
+
+def sweepPuzzles(puzzles: list[tuple[list[list[int]], list[list[int]]]]) -> list[Conflict | None]:
+    return Engine.sweepBoards([(rowNums, colNums, BitBoard(len(colNums), len(rowNums))) for rowNums, colNums in puzzles])
+
+def buildCases(seed: int, scale: float) -> list[Case]:
+    # Every corpus is drawn from its own seeded generator, so adding or resizing a case
+    # doesn't change the inputs of the others
+    def count(base: int) -> int:
+        return max(1, round(base * scale))
+
+    cases: list[Case] = []
+    for length in LINE_LENGTHS:
+        rng = random.Random(f"{seed}-lines-{length}")
+        lines = [randomLine(rng, length, rng.uniform(0.4, 0.8), 0.3) for _ in range(count(100))]
+        cases.append((f"solveRow/random/{length}", Engine.solveRow, [((row, nums), {}) for row, nums in lines]))
+        cases.append((f"solveRow/adversarial/{length}", Engine.solveRow, [((row, nums), {}) for row, nums in adversarialLines(length)] * count(20)))
+        cases.append((f"tilesAreValid/random/{length}", Engine.tilesAreValid, [((row, nums), {}) for row, nums in lines]))
+
+    for size in BOARD_SIZES:
+        for density in BOARD_DENSITIES:
+            rng = random.Random(f"{seed}-boards-{size}-{density}")
+            puzzles = [randomPuzzle(rng, size, density) for _ in range(count(max(2, 100 // size)))]
+            inputs = [((rowNums, colNums), {}) for _, rowNums, colNums in puzzles]
+            cases.append((f"solveBoard/{size}x{size}/{density}", Engine.solveBoard, inputs))
+            cases.append((f"boardIsSolvable/{size}x{size}/{density}", Engine.boardIsSolvable, inputs))
+            if LineBatch.available():
+                # All the puzzles swept together, to compare with solving them one by one above
+                cases.append((f"sweepBoards/{size}x{size}/{density}", sweepPuzzles, [(([(rowNums, colNums) for _, rowNums, colNums in puzzles],), {})]))
+
+    for size in BOARD_SIZES:
+        rng = random.Random(f"{seed}-replay-{size}")
+        inputs = [((randomLoggedGame(rng, size, 0.6),), {}) for _ in range(count(max(2, 500 // size)))]
+        cases.append((f"replay/{size}x{size}", MoveLog.replay, inputs))
+
+    for size, density in GENERATE_CASES:
+        inputs = [((size, size, density), {"rng": random.Random(f"{seed}-generate-{size}-{i}")}) for i in range(count(max(2, 50 // size)))]
+        cases.append((f"generateBoard/{size}x{size}/{density}", Engine.generateBoard, inputs))
+    return cases
+
+def freshArgs(args: tuple, kwargs: dict) -> tuple[tuple, dict]:
+    # A generator handed to generateBoard is consumed, so every run gets a copy in the saved state
+    if "rng" not in kwargs:
+        return args, kwargs
+    rng = random.Random()
+    rng.setstate(kwargs["rng"].getstate())
+    return args, {**kwargs, "rng": rng}
+
+def calibrate() -> float:
+    # A fixed pure Python workload, so runs on a slower machine can still be compared:
+    # p50 latencies are compared relative to it
+    start: int = time.perf_counter_ns()
+    mask: int = 0
+    for i in range(200000):
+        mask = (mask << 1 ^ i) & 0xFFFFFFFF
+    return (time.perf_counter_ns() - start) / 1e9
+
+def percentile(sortedValues: list[float], fraction: float) -> float:
+    # Nearest rank
+    return sortedValues[min(len(sortedValues) - 1, max(0, round(fraction * len(sortedValues) + 0.5) - 1))]
+
+def timeCase(function: Callable, inputs: list[tuple[tuple, dict]]) -> list[float]:
+    # Each call starts from a cold line cache so results don't depend on case order
+    timings: list[float] = []
+    for args, kwargs in inputs:
+        args, kwargs = freshArgs(args, kwargs)
+        Engine.lineCache.clear()
+        start: int = time.perf_counter_ns()
+        function(*args, **kwargs)
+        timings.append((time.perf_counter_ns() - start) / 1e9)
+    return timings
+
+def measurePeak(function: Callable, inputs: list[tuple[tuple, dict]]) -> int:
+    peak: int = 0
+    for args, kwargs in inputs[:MEMORY_SAMPLES]:
+        args, kwargs = freshArgs(args, kwargs)
+        Engine.lineCache.clear()
+        tracemalloc.start()
+        function(*args, **kwargs)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak
+
+def runSuite(cases: list[Case], repeat: int) -> tuple[float, dict[str, dict[str, float]]]:
+    # The whole suite is run repeat times over and every input keeps its fastest time. Spreading
+    # the repeats out means a stretch where the machine is busy only costs one of them.
+    calibration: float = 0
+    best: dict[str, list[float]] = {}
+    for attempt in range(repeat):
+        calibration = calibrate() if attempt == 0 else min(calibration, calibrate())
+        for name, function, inputs in cases:
+            timings: list[float] = timeCase(function, inputs)
+            best[name] = timings if attempt == 0 else [min(pair) for pair in zip(best[name], timings)]
+            print(f"round {attempt + 1}/{repeat} {name}: {sum(timings):.2f}s", file = sys.stderr, flush = True)
+
+    stats: dict[str, dict[str, float]] = {}
+    for name, function, inputs in cases:
+        timings = sorted(best[name])
+        total: float = sum(timings)
+        stats[name] = {
+            "calls": len(timings),
+            "seconds": total,
+            "throughput": len(timings) / total if total > 0 else float("inf"),
+            "p50": percentile(timings, 0.50),
+            "p99": percentile(timings, 0.99),
+            "peakKiB": measurePeak(function, inputs) / 1024,
+        }
+    return calibration, stats
+
+def boardExtends(board: list[list[int]], result: list[list[int]]) -> bool:
+    return all(tile == STATES["UNKNOWN"] or tile == result[x][y] for x, column in enumerate(board) for y, tile in enumerate(column))
+
+def checkFixtures() -> list[str]:
+    # The fixtures from testing.py are one position of a puzzle with several solutions:
+    # TESTBOARD, where line logic is stuck, and SOLUTION and COUNTERBOARD, which settle
+    # its tile (4, 2) the two possible ways. On top of those, line logic has to be sound:
+    # a tile it settles on a seeded corpus has to match the board the clues were taken from.
+    failures: list[str] = []
+    if Engine.solveBoard(TESTROWS, TESTCOLS, TESTBOARD) != TESTBOARD:
+        failures.append("solveBoard(TESTBOARD) should make no progress")
+    for name, board in (("TESTBOARD", TESTBOARD), ("SOLUTION", SOLUTION), ("COUNTERBOARD", COUNTERBOARD)):
+        if not Engine.boardIsValid(TESTROWS, TESTCOLS, board):
+            failures.append(f"{name} should be valid")
+        if not boardExtends(board, Engine.solveBoard(TESTROWS, TESTCOLS, board)):
+            failures.append(f"solveBoard({name}) changed a settled tile")
+    if Engine.boardIsSolvable(TESTROWS, TESTCOLS, TESTBOARD) or Engine.boardIsSolvable(TESTROWS, TESTCOLS, SOLUTION):
+        failures.append("TESTBOARD and SOLUTION should not be solvable by line logic")
+    if not Engine.boardIsSolvable(TESTROWS, TESTCOLS, COUNTERBOARD):
+        failures.append("COUNTERBOARD should be solvable by line logic")
+    total: int = Engine.countSolutions(TESTROWS, TESTCOLS, TESTBOARD, limit = 100)
+    split: int = Engine.countSolutions(TESTROWS, TESTCOLS, SOLUTION, limit = 100) + Engine.countSolutions(TESTROWS, TESTCOLS, COUNTERBOARD, limit = 100)
+    if total != split or Engine.countSolutions(TESTROWS, TESTCOLS, COUNTERBOARD, limit = 100) != 1:
+        failures.append("solution counts of the fixtures don't add up")
+
+    rng = random.Random("fixtures")
+    for _ in range(50):
+        size: int = rng.randint(3, 15)
+        bits, rowNums, colNums = randomPuzzle(rng, size, rng.uniform(0.4, 0.8))
+        result: BitBoard = Engine.boardToBits(rowNums, colNums, Engine.solveBoard(rowNums, colNums))
+        for x in range(size):
+            if result.colFilled[x] & ~bits.colFilled[x] or result.colEmpty[x] & ~bits.colEmpty[x]:
+                failures.append(f"solveBoard settled a tile against the solution on a {size}x{size} board")
+                break
+    return failures
+
+def loadResults(path: str) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        results: dict = json.load(file)
+    return results if results.get("version") == RESULTS_VERSION else None
+
+def compareResults(previous: dict, current: dict, threshold: float) -> list[str]:
+    regressions: list[str] = []
+    if previous.get("seed") != current["seed"] or previous.get("scale") != current["scale"]:
+        print("Previous run used a different corpus, comparison skipped", file = sys.stderr)
+        return regressions
+    for name, stats in current["cases"].items():
+        old: dict | None = previous["cases"].get(name)
+        if old == None:
+            continue
+        change: float = stats["p50"] / old["p50"] * previous["calibration"] / current["calibration"] - 1
+        stats["p50Change"] = change
+        if change > threshold:
+            regressions.append(f"{name}: p50 {old['p50'] * 1e3:.3f}ms -> {stats['p50'] * 1e3:.3f}ms ({change:+.0%} after calibration)")
+        if stats["peakKiB"] > old["peakKiB"] * (1 + threshold) + MEMORY_SLACK_KIB:
+            regressions.append(f"{name}: peak memory {old['peakKiB']:.1f}KiB -> {stats['peakKiB']:.1f}KiB")
+    return regressions
+
+def printTable(results: dict) -> None:
+    print(f"{'case':40} {'calls':>6} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'peak KiB':>9} {'vs prev':>8}")
+    for name, stats in results["cases"].items():
+        change: str = f"{stats['p50Change']:+.0%}" if "p50Change" in stats else ""
+        print(f"{name:40} {stats['calls']:>6} {stats['throughput']:>10.1f} {stats['p50'] * 1e3:>9.3f} {stats['p99'] * 1e3:>9.3f} {stats['peakKiB']:>9.1f} {change:>8}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark the solver and generator and compare with the previous run")
+    parser.add_argument('-o', '--output', default = BENCHMARK_PATH, help = "where to save the results")
+    parser.add_argument('--baseline', default = None, help = "results to compare with, the previous output by default")
+    parser.add_argument('--seed', default = DEFAULT_SEED, type = int)
+    parser.add_argument('--scale', default = 1.0, type = float, help = "multiplies the number of inputs per case")
+    parser.add_argument('--repeat', default = REPEAT, type = int, help = "rounds over the suite, the fastest time of each input is kept")
+    parser.add_argument('--only', default = "", help = "only run cases whose name contains this")
+    parser.add_argument('--threshold', default = REGRESSION_THRESHOLD, type = float)
+    args = parser.parse_args()
+
+    failures: list[str] = checkFixtures()
+    if failures:
+        print("Correctness checks failed:\n  " + "\n  ".join(failures), file = sys.stderr)
+        sys.exit(1)
+
+    previous: dict | None = loadResults(args.baseline or args.output)
+    results: dict = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec = "seconds"),
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "scale": args.scale,
+    }
+    cases: list[Case] = [case for case in buildCases(args.seed, args.scale) if args.only in case[0]]
+    results["calibration"], results["cases"] = runSuite(cases, args.repeat)
+
+    regressions: list[str] = compareResults(previous, results, args.threshold) if previous != None else []
+    printTable(results)
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent = 1)
+    if regressions:
+        print("Regressions against the previous run:\n  " + "\n  ".join(regressions), file = sys.stderr)
+        sys.exit(1)
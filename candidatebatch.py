@@ -0,0 +1,57 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class CandidateBatch():
+    # Candidate boards drawn many at a time from a numpy generator, as a boolean array of shape
+    # (count, width, height) laid out column by column like BitBoard. The clues of every row and
+    # column of every board are found together from the edges of runs, and kept as one list of
+    # run lengths per side with the offset of each line's runs in it.
+
+    def __init__(self, generator: "np.random.Generator", count: int, width: int, height: int, fillPercent: float):
+        self.width: int = width
+        self.height: int = height
+        self.mined = generator.random((count, width, height)) <= fillPercent
+        self.rowRuns, self.rowOffsets = CandidateBatch.runs(self.mined.transpose(0, 2, 1).reshape(count * height, width))
+        self.colRuns, self.colOffsets = CandidateBatch.runs(self.mined.reshape(count * width, height))
+
+    def __len__(self) -> int:
+        return self.mined.shape[0]
+
+    @staticmethod
+    def available() -> bool:
+        return np != None
+
+    @staticmethod
+    def generator(seed: int | None = None) -> "np.random.Generator":
+        return np.random.default_rng(seed)
+
+    @staticmethod
+    def runs(lines: "np.ndarray") -> tuple[list[int], list[int]]:
+        # The run lengths of every line of a (lines, length) array in order, and the offset of
+        # each line's first run, with the total count at the end. The lines are laid end to end
+        # with an empty tile before each, so one pass over the edges finds every run.
+        count, length = lines.shape
+        stride: int = length + 1
+        flat = np.zeros(count * stride + 1, dtype = np.int8)
+        flat[:-1].reshape(count, stride)[:, 1:] = lines
+        edges = np.diff(flat)
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        offsets = np.searchsorted(starts, np.arange(count + 1) * stride)
+        return (ends - starts).tolist(), offsets.tolist()
+
+    @staticmethod
+    def lineNums(runs: list[int], offsets: list[int], first: int, count: int) -> list[list[int]]:
+        # Lines without mines get [0], as from Engine.getListNums
+        return [runs[offsets[line]:offsets[line + 1]] or [0] for line in range(first, first + count)]
+
+    def nums(self, index: int) -> tuple[list[list[int]], list[list[int]]]:
+        # The row and column nums of one board
+        return CandidateBatch.lineNums(self.rowRuns, self.rowOffsets, index * self.height, self.height), CandidateBatch.lineNums(self.colRuns, self.colOffsets, index * self.width, self.width)
+
+    def colFilled(self, index: int) -> list[int]:
+        # The mined column masks of one board
+        packed = np.packbits(self.mined[index], axis = 1, bitorder = "little")
+        return [int.from_bytes(column.tobytes(), "little") for column in packed]
@@ -0,0 +1,1233 @@
+import random
+import os
+import heapq
+import importlib.util
+import json
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+from puzzlebank import PuzzleBank
+from solvecache import SolveCache, CachedSolve, STATUSES
+
+MAX_GENERATE_ATTEMPTS: int = 64
+MAX_UNKNOWN_TOLERANCE: int = 8
+DIFFICULTY_INCREMENT: float = 0.05
+# Boards with at least this many tiles are generated by local repair instead of redrawing them
+REPAIR_MIN_TILES: int = 900
+# How far a repaired board's fill may drift from the one asked for
+REPAIR_TOLERANCE: float = 0.02
+# Each repair step tries flipping this many tiles, this many times over, and keeps the best try
+REPAIR_FLIPS: int = 4
+REPAIR_TRIES: int = 4
+# Probing is only spread over a process pool while at least this many tiles are unknown
+PARALLEL_PROBE_MIN_UNKNOWN: int = 200
+LINE_CACHE_SIZE: int = 1 << 16
+# With numpy, generating switches to drawing candidates in batches once this many have been turned
+# down one by one. Most boards are accepted before that, and a batch only pays off when many
+# candidates get drawn. Batches start this size and double up to CANDIDATE_BATCH_SIZE.
+CANDIDATE_BATCH_AFTER: int = 4
+CANDIDATE_BATCH_SIZE: int = 64
+# Checked without importing numpy, which generateBatched only loads once it's used
+NUMPY_AVAILABLE: bool = importlib.util.find_spec("numpy") != None
+PUZZLE_BANK_PATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "puzzles.bank")
+SOLVE_CACHE_PATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solves.db")
+STATES = {
+    "UNKNOWN" : 0,
+    "MINED" : 1,
+    "FLAGGED" : -1
+}
+VISUALS: dict[int, str] = {
+    STATES["UNKNOWN"]: "?",
+    STATES["FLAGGED"]: "X",
+    STATES["MINED"]: "O"
+}
+# Engine methods counted and timed while stats are collected. Methods that are handed to
+# process pools stay out, since their instrumented versions can't be pickled.
+INSTRUMENTED: list[str] = [
+    "cachedSolveLine", "computeLine", "lineIsValid", "propagate", "sweepBoards", "solveBits", "bitsAreValid",
+    "probeBits", "probeParallel", "tryTile", "findSolutions", "candidateIsAccepted", "numsAreAccepted", "randomBits",
+    "generateBoard", "generateBatched", "repairBoard", "generateBoardParallel"
+]
+
+class BitBoard():
+    # Each row and column is a pair of bitmasks: tiles known to be mined and tiles known to be flagged.
+    # Bit x of a row mask is column x, bit y of a column mask is row y.
+    
+    def __init__(self, width: int, height: int):
+        self.width, self.height = width, height
+        self.rowFilled: list[int] = [0] * height
+        self.rowEmpty: list[int] = [0] * height
+        self.colFilled: list[int] = [0] * width
+        self.colEmpty: list[int] = [0] * width
+        self.lineSolves: int = 0
+        
+    @staticmethod
+    def fromList(board: list[list[int]]) -> "BitBoard":
+        bits = BitBoard(len(board), len(board[0]) if board else 0)
+        for x in range(bits.width):
+            for y in range(bits.height):
+                if board[x][y] != STATES["UNKNOWN"]:
+                    bits.setTile(x, y, board[x][y])
+        return bits
+    
+    @staticmethod
+    def fromColumns(height: int, colFilled: list[int], colEmpty: list[int] | None = None) -> "BitBoard":
+        # A board from its column masks, fully known with every tile not mined flagged unless
+        # the flagged masks are given
+        bits = BitBoard(len(colFilled), height)
+        for x in range(bits.width):
+            bits.setCol(x, colFilled[x], BitBoard.fullMask(height) & ~colFilled[x] if colEmpty == None else colEmpty[x])
+        return bits
+    
+    def toList(self) -> list[list[int]]:
+        outBoard: list[list[int]] = list()
+        for x in range(self.width):
+            filled, empty = self.colFilled[x], self.colEmpty[x]
+            outBoard.append([STATES["MINED"] if filled >> y & 1 else STATES["FLAGGED"] if empty >> y & 1 else STATES["UNKNOWN"] for y in range(self.height)])
+        return outBoard
+    
+    def copy(self) -> "BitBoard":
+        bits = BitBoard(self.width, self.height)
+        bits.rowFilled, bits.rowEmpty = self.rowFilled[:], self.rowEmpty[:]
+        bits.colFilled, bits.colEmpty = self.colFilled[:], self.colEmpty[:]
+        bits.lineSolves = self.lineSolves
+        return bits
+    
+    def getTile(self, x: int, y: int) -> int:
+        if self.colFilled[x] >> y & 1:
+            return STATES["MINED"]
+        if self.colEmpty[x] >> y & 1:
+            return STATES["FLAGGED"]
+        return STATES["UNKNOWN"]
+    
+    def setTile(self, x: int, y: int, state: int) -> None:
+        if state == STATES["MINED"]:
+            self.rowFilled[y] |= 1 << x
+            self.colFilled[x] |= 1 << y
+        elif state == STATES["FLAGGED"]:
+            self.rowEmpty[y] |= 1 << x
+            self.colEmpty[x] |= 1 << y
+            
+    def flipTile(self, x: int, y: int) -> None:
+        # Swaps a known tile between mined and flagged
+        self.rowFilled[y] ^= 1 << x
+        self.rowEmpty[y] ^= 1 << x
+        self.colFilled[x] ^= 1 << y
+        self.colEmpty[x] ^= 1 << y
+    
+    def forgetTile(self, x: int, y: int) -> None:
+        self.rowFilled[y] &= ~(1 << x)
+        self.rowEmpty[y] &= ~(1 << x)
+        self.colFilled[x] &= ~(1 << y)
+        self.colEmpty[x] &= ~(1 << y)
+            
+    def setRow(self, y: int, filled: int, empty: int) -> int:
+        # Returns a mask of the columns whose tile in this row changed
+        newFilled: int = filled & ~self.rowFilled[y]
+        newEmpty: int = empty & ~self.rowEmpty[y]
+        self.rowFilled[y] |= filled
+        self.rowEmpty[y] |= empty
+        BitBoard.scatter(newFilled, 1 << y, self.colFilled)
+        BitBoard.scatter(newEmpty, 1 << y, self.colEmpty)
+        return newFilled | newEmpty
+    
+    def setCol(self, x: int, filled: int, empty: int) -> int:
+        # Returns a mask of the rows whose tile in this column changed
+        newFilled: int = filled & ~self.colFilled[x]
+        newEmpty: int = empty & ~self.colEmpty[x]
+        self.colFilled[x] |= filled
+        self.colEmpty[x] |= empty
+        BitBoard.scatter(newFilled, 1 << x, self.rowFilled)
+        BitBoard.scatter(newEmpty, 1 << x, self.rowEmpty)
+        return newFilled | newEmpty
+    
+    def include(self, other: "BitBoard") -> tuple[int, int]:
+        # Adds every tile known in other, returning masks of the rows and columns that changed
+        changedRows: int = 0
+        changedCols: int = 0
+        for x in range(self.width):
+            changed: int = self.setCol(x, other.colFilled[x], other.colEmpty[x])
+            if changed:
+                changedRows |= changed
+                changedCols |= 1 << x
+        return changedRows, changedCols
+    
+    @staticmethod
+    def common(first: "BitBoard", second: "BitBoard") -> "BitBoard":
+        # Only the tiles both boards agree on
+        bits = BitBoard(first.width, first.height)
+        for x in range(first.width):
+            bits.setCol(x, first.colFilled[x] & second.colFilled[x], first.colEmpty[x] & second.colEmpty[x])
+        return bits
+    
+    def countUnknown(self) -> int:
+        known: int = 0
+        for x in range(self.width):
+            known += (self.colFilled[x] | self.colEmpty[x]).bit_count()
+        return self.width * self.height - known
+    
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BitBoard):
+            return NotImplemented
+        return self.colFilled == other.colFilled and self.colEmpty == other.colEmpty
+    
+    @staticmethod
+    def scatter(mask: int, bit: int, lines: list[int]) -> None:
+        while mask:
+            low: int = mask & -mask
+            lines[low.bit_length() - 1] |= bit
+            mask ^= low
+    
+    @staticmethod
+    def fullMask(length: int) -> int:
+        return (1 << length) - 1
+    
+    @staticmethod
+    def reverse(mask: int, length: int) -> int:
+        if length == 0:
+            return 0
+        return int(format(mask, f"0{length}b")[::-1], 2)
+    
+    @staticmethod
+    def smearUp(mask: int, length: int) -> int:
+        # Sets bits i..i+length-1 for every bit i of mask
+        span: int = 1
+        while span < length:
+            step: int = min(span, length - span)
+            mask |= mask << step
+            span += step
+        return mask
+    
+    @staticmethod
+    def smearDown(mask: int, length: int) -> int:
+        # Sets bits i-length+1..i for every bit i of mask
+        span: int = 1
+        while span < length:
+            step: int = min(span, length - span)
+            mask |= mask >> step
+            span += step
+        return mask
+    
+    @staticmethod
+    def flood(seeds: int, passable: int) -> int:
+        # Every bit reachable from a seed by stepping up over passable bits,
+        # one carry chain per run of passable bits
+        return seeds | (((seeds & passable) + passable) ^ passable)
+        
+        
+    
+# A line whose known tiles can't meet its nums, as (isRow, index)
+Conflict = tuple[bool, int]
+# A tile to guess at, with the value to try first
+Branch = tuple[int, int, int]
+
+class SolveResult():
+    # What solving a board came to. The status is one of STATUSES: SOLVED, STUCK with everything
+    # the solver could settle, or INVALID, where the solve stopped at the first line found to
+    # contradict its nums. That line is the conflict, unless the result came from the solve cache.
+    
+    def __init__(self, status: int, bits: BitBoard, conflict: Conflict | None = None):
+        self.status: int = status
+        self.bits: BitBoard = bits
+        self.conflict: Conflict | None = conflict
+    
+    def isValid(self) -> bool:
+        return self.status != STATUSES["INVALID"]
+    
+    def isSolved(self) -> bool:
+        return self.status == STATUSES["SOLVED"]
+    
+    def toList(self) -> list[list[int]]:
+        return self.bits.toList()
+    
+    
+    
+class LineCache():
+    # Least recently used cache of line solves, keyed on the packed line state and its nums.
+    # A stored result of None records a contradiction.
+    
+    def __init__(self, maxsize: int):
+        self.maxsize: int = maxsize
+        self.entries: OrderedDict[tuple[int, ...], tuple[int, int] | None] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        
+    @staticmethod
+    def key(length: int, filled: int, empty: int, nums: list[int]) -> tuple[int, ...]:
+        # The top bit marks the line length so lines of different lengths never collide
+        return (1 << 2 * length | empty << length | filled, *nums)
+    
+    def lookup(self, key: tuple[int, ...]) -> tuple[bool, tuple[int, int] | None]:
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return True, self.entries[key]
+        self.misses += 1
+        return False, None
+    
+    def store(self, key: tuple[int, ...], result: tuple[int, int] | None) -> None:
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last = False)
+            
+    def resize(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        while len(self.entries) > max(maxsize, 0):
+            self.entries.popitem(last = False)
+    
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    
+    
+class SolverStats():
+    # Calls, deepest nesting and time spent in each instrumented engine method over a run.
+    # Times are inclusive and a recursive call only counts towards the outermost one.
+    # densities counts the candidate boards drawn at each fill percent while generating.
+    
+    def __init__(self):
+        self.calls: dict[str, int] = {name: 0 for name in INSTRUMENTED}
+        self.seconds: dict[str, float] = {name: 0.0 for name in INSTRUMENTED}
+        self.maxDepth: dict[str, int] = {name: 0 for name in INSTRUMENTED}
+        self.depth: dict[str, int] = {name: 0 for name in INSTRUMENTED}
+        self.densities: dict[float, int] = {}
+    
+    def enter(self, name: str) -> None:
+        self.calls[name] += 1
+        self.depth[name] += 1
+        self.maxDepth[name] = max(self.maxDepth[name], self.depth[name])
+    
+    def exit(self, name: str, seconds: float) -> None:
+        self.depth[name] -= 1
+        if self.depth[name] == 0:
+            self.seconds[name] += seconds
+    
+    def merge(self, other: "SolverStats") -> None:
+        for name in INSTRUMENTED:
+            self.calls[name] += other.calls[name]
+            self.seconds[name] += other.seconds[name]
+            self.maxDepth[name] = max(self.maxDepth[name], other.maxDepth[name])
+        for density, count in other.densities.items():
+            self.densities[density] = self.densities.get(density, 0) + count
+    
+    def cacheHits(self) -> int:
+        # computeLine only runs when the line cache misses
+        return self.calls["cachedSolveLine"] - self.calls["computeLine"]
+    
+    def toDict(self) -> dict:
+        return {
+            "calls": {name: count for name, count in self.calls.items() if count},
+            "seconds": {name: round(seconds, 6) for name, seconds in self.seconds.items() if self.calls[name]},
+            "maxDepth": {name: depth for name, depth in self.maxDepth.items() if depth},
+            "cacheHits": self.cacheHits(),
+            "densities": {f"{density:.4f}": count for density, count in sorted(self.densities.items())},
+        }
+    
+    def dump(self, path: str, **context) -> None:
+        # Appends one JSON line, with context such as the board size, so runs can be searched later
+        with open(path, "a") as file:
+            file.write(json.dumps({**context, **self.toDict()}) + "\n")
+    
+    
+    
+class Engine():
+    
+    lineCache: LineCache = LineCache(LINE_CACHE_SIZE)
+    stats: SolverStats | None = None
+    solveCache: SolveCache | None = None
+    
+    @staticmethod
+    @contextmanager
+    def collectStats(stats: SolverStats | None) -> Iterator[SolverStats | None]:
+        # Records into stats while the block runs, or does nothing when stats is None. The
+        # instrumented methods are only swapped in for the outermost block, so the engine runs
+        # untouched when nothing is collecting. A nested block's stats are added to the outer ones.
+        if stats == None:
+            yield None
+            return
+        outer: SolverStats | None = Engine.stats
+        originals: dict[str, staticmethod] = {}
+        if outer == None:
+            for name in INSTRUMENTED:
+                originals[name] = Engine.__dict__[name]
+                setattr(Engine, name, staticmethod(Engine.instrument(name, originals[name].__func__)))
+        Engine.stats = stats
+        try:
+            yield stats
+        finally:
+            Engine.stats = outer
+            if outer != None:
+                outer.merge(stats)
+            for name, original in originals.items():
+                setattr(Engine, name, original)
+    
+    @staticmethod
+    @contextmanager
+    def cachingSolves(cache: SolveCache | None) -> Iterator[SolveCache | None]:
+        # Solves from an empty board go through cache while the block runs. Process pools don't
+        # carry the cache into their workers.
+        outer: SolveCache | None = Engine.solveCache
+        Engine.solveCache = cache
+        try:
+            yield cache
+        finally:
+            Engine.solveCache = outer
+    
+    @staticmethod
+    def lookupSolve(rowNums: list[list[int]], colNums: list[list[int]]) -> CachedSolve | None:
+        if Engine.solveCache == None:
+            return None
+        return Engine.solveCache.get(rowNums, colNums)
+    
+    @staticmethod
+    def recordSolve(rowNums: list[list[int]], colNums: list[list[int]], result: SolveResult, isUnique: bool | None = None) -> None:
+        # Stores what solving from an empty board made of these nums. Boards left with unknown
+        # tiles are only stored as stuck, since how far the solver's hypotheticals get depends
+        # on the orientation.
+        if Engine.solveCache == None:
+            return
+        if not result.isValid():
+            Engine.solveCache.put(rowNums, colNums, STATUSES["INVALID"], False)
+        elif result.isSolved():
+            Engine.solveCache.put(rowNums, colNums, STATUSES["SOLVED"], True, result.bits.colFilled)
+        else:
+            Engine.solveCache.put(rowNums, colNums, STATUSES["STUCK"], isUnique)
+    
+    @staticmethod
+    def instrument(name: str, method: Callable) -> Callable:
+        def instrumented(*args, **kwargs):
+            stats: SolverStats = Engine.stats
+            if name == "randomBits":
+                density: float = round(args[2] if len(args) > 2 else kwargs["fillPercent"], 4)
+                stats.densities[density] = stats.densities.get(density, 0) + 1
+            stats.enter(name)
+            start: float = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                stats.exit(name, time.perf_counter() - start)
+        return instrumented
+    
+    @staticmethod
+    def solveRow(row: list[int], nums: list[int]) -> list[int]:
+        filled, empty = Engine.listToMasks(row)
+        filled, empty = Engine.solveLine(len(row), filled, empty, nums)
+        return Engine.masksToList(len(row), filled, empty)
+            
+    @staticmethod
+    def tilesAreValid(tile_states: list[int], nums: list[int]) -> bool:
+        filled, empty = Engine.listToMasks(tile_states)
+        return Engine.lineIsValid(len(tile_states), filled, empty, nums)
+    
+    @staticmethod
+    def listToMasks(tiles: list[int]) -> tuple[int, int]:
+        filled: int = 0
+        empty: int = 0
+        for i in range(len(tiles)):
+            if tiles[i] == STATES["MINED"]:
+                filled |= 1 << i
+            elif tiles[i] == STATES["FLAGGED"]:
+                empty |= 1 << i
+        return filled, empty
+    
+    @staticmethod
+    def masksToList(length: int, filled: int, empty: int) -> list[int]:
+        return [STATES["MINED"] if filled >> i & 1 else STATES["FLAGGED"] if empty >> i & 1 else STATES["UNKNOWN"] for i in range(length)]
+    
+    @staticmethod
+    def solveLine(length: int, filled: int, empty: int, nums: list[int]) -> tuple[int, int]:
+        result: tuple[int, int] | None = Engine.cachedSolveLine(length, filled, empty, nums)
+        if result == None:
+            raise Exception("Invalid nums for this row")
+        return result
+    
+    @staticmethod
+    def cachedSolveLine(length: int, filled: int, empty: int, nums: list[int]) -> tuple[int, int] | None:
+        if nums == [0]:
+            nums = []
+        key: tuple[int, ...] = LineCache.key(length, filled, empty, nums)
+        found, result = Engine.lineCache.lookup(key)
+        if not found:
+            result = Engine.computeLine(length, filled, empty, nums)
+            Engine.lineCache.store(key, result)
+        return result
+    
+    @staticmethod
+    def computeLine(length: int, filled: int, empty: int, nums: list[int]) -> tuple[int, int] | None:
+        k: int = len(nums)
+        full: int = BitBoard.fullMask(length)
+        fwd = Engine.lineReachability(length, filled, empty, nums)
+        if not fwd[k] >> length & 1:
+            return None
+        rev = Engine.lineReachability(length, BitBoard.reverse(filled, length), BitBoard.reverse(empty, length), nums[::-1])
+        # bwd[j] has bit i set when blocks j onward fit in the tiles from i to the end
+        bwd: list[int] = [BitBoard.reverse(rev[k - j], length + 1) for j in range(k + 1)]
+        passable: int = full & ~filled
+        
+        # A tile can be flagged if some split of the blocks leaves a gap over it
+        canFlag: int = 0
+        for j in range(k + 1):
+            canFlag |= fwd[j] & (bwd[j] >> 1)
+        canFlag &= passable
+        
+        # A tile can be mined if some valid placement of a block covers it
+        canMine: int = 0
+        for j in range(k):
+            starts: int = Engine.blockStarts(fwd[j], passable, j) & Engine.blockFits(length, empty, nums[j])
+            ends: int = (bwd[j + 1] >> 1) & passable
+            if j == k - 1:
+                ends |= 1 << length
+            canMine |= BitBoard.smearUp(starts & (ends >> nums[j]), nums[j])
+        
+        return full & ~canFlag, full & ~canMine
+    
+    @staticmethod
+    def lineIsValid(length: int, filled: int, empty: int, nums: list[int]) -> bool:
+        return Engine.cachedSolveLine(length, filled, empty, nums) != None
+    
+    @staticmethod
+    def lineReachability(length: int, filled: int, empty: int, nums: list[int]) -> list[int]:
+        # reach[j] has bit i set when the first j blocks fit in the first i tiles
+        # without leaving a mined tile uncovered
+        passable: int = BitBoard.fullMask(length) & ~filled
+        reach: list[int] = [BitBoard.flood(1, passable)]
+        for j in range(len(nums)):
+            starts: int = Engine.blockStarts(reach[j], passable, j) & Engine.blockFits(length, empty, nums[j])
+            reach.append(BitBoard.flood(starts << nums[j], passable))
+        return reach
+    
+    @staticmethod
+    def blockStarts(reach: int, passable: int, blockIndex: int) -> int:
+        # Block j may start at i if the first j blocks end before i with a gap tile in between
+        if blockIndex == 0:
+            return reach
+        return (reach & passable) << 1
+    
+    @staticmethod
+    def blockFits(length: int, empty: int, size: int) -> int:
+        # Starting tiles of every span of size tiles with no flagged tile in it
+        if size > length:
+            return 0
+        return BitBoard.fullMask(length - size + 1) & ~BitBoard.smearDown(empty, size)
+    
+    @staticmethod
+    def getListNums(tiles: list[int]) -> list[int]:
+        if STATES["UNKNOWN"] in tiles:
+            raise Exception("Can't get list nums for a list with unknown tiles")
+        outnums: list[int] = []
+        total: int = 0
+        for tile in tiles:
+            if tile == STATES["MINED"]:
+                total += 1
+            elif total > 0:
+                outnums.append(total)
+                total = 0
+        if total > 0 or len(outnums) == 0:
+            outnums.append(total)
+        return outnums
+    
+    @staticmethod
+    def solveBoard(rowNums: list[list[int]], colNums: list[list[int]], board: list[list[int]] | None = None, stats: SolverStats | None = None, batched: bool = False) -> list[list[int]]:
+        # Raises when the board has no solution, solveStatus says so without raising
+        result: SolveResult = Engine.solveStatus(rowNums, colNums, board, stats, batched)
+        if not result.isValid():
+            raise Exception("Board has no solution")
+        return result.toList()
+    
+    @staticmethod
+    def solveStatus(rowNums: list[list[int]], colNums: list[list[int]], board: list[list[int]] | None = None, stats: SolverStats | None = None, batched: bool = False) -> SolveResult:
+        # Solves from board, or from an empty board through the solve cache
+        with Engine.collectStats(stats):
+            bits: BitBoard = Engine.boardToBits(rowNums, colNums, board)
+            if board != None:
+                return Engine.solveBits(rowNums, colNums, bits, batched)
+            cached: CachedSolve | None = Engine.lookupSolve(rowNums, colNums)
+            if cached != None and cached[0] == STATUSES["SOLVED"] and cached[2] != None:
+                return SolveResult(STATUSES["SOLVED"], BitBoard.fromColumns(len(rowNums), cached[2]))
+            if cached != None and cached[0] == STATUSES["INVALID"]:
+                return SolveResult(STATUSES["INVALID"], bits)
+            result: SolveResult = Engine.solveBits(rowNums, colNums, bits, batched)
+            Engine.recordSolve(rowNums, colNums, result)
+            return result
+    
+    @staticmethod
+    def solveBits(rowNums: list[list[int]], colNums: list[list[int]], bits: BitBoard, batched: bool = False) -> SolveResult:
+        # Solves bits in place as far as line logic and hypotheticals get. Batched solving sweeps
+        # whole sides of the board with LineBatch instead of solving one line at a time.
+        conflict: Conflict | None = Engine.sweepBits(rowNums, colNums, bits) if batched else Engine.propagate(rowNums, colNums, bits)
+        if conflict != None:
+            return SolveResult(STATUSES["INVALID"], bits, conflict)
+        
+        # Manage hypotheticals
+        total: int = bits.countUnknown()
+        if total == 0:
+            return SolveResult(STATUSES["SOLVED"], bits)
+        if total > MAX_UNKNOWN_TOLERANCE:
+            return SolveResult(STATUSES["STUCK"], bits)
+        qx: int = -1
+        qy: int = -1
+        for x in range(bits.width):
+            unknown: int = BitBoard.fullMask(bits.height) & ~(bits.colFilled[x] | bits.colEmpty[x])
+            if unknown:
+                qx = x
+                qy = unknown.bit_length() - 1
+        
+        hypoMined: BitBoard = bits.copy()
+        hypoFlagged: BitBoard = bits.copy()
+        hypoMined.setTile(qx, qy, STATES["MINED"])
+        hypoFlagged.setTile(qx, qy, STATES["FLAGGED"])
+        # Each branch is solved once, and a branch that holds up when the other doesn't is the
+        # answer as it stands. The line solves spent on both are carried forward to whichever
+        # board is returned.
+        minedResult: SolveResult = Engine.solveBits(rowNums, colNums, hypoMined, batched)
+        hypoFlagged.lineSolves = minedResult.bits.lineSolves
+        if not minedResult.isValid():
+            return Engine.solveBits(rowNums, colNums, hypoFlagged, batched)
+        flaggedResult: SolveResult = Engine.solveBits(rowNums, colNums, hypoFlagged, batched)
+        minedResult.bits.lineSolves = bits.lineSolves = flaggedResult.bits.lineSolves
+        if not flaggedResult.isValid():
+            return minedResult
+        return SolveResult(STATUSES["STUCK"], bits)
+    
+    @staticmethod
+    def propagate(rowNums: list[list[int]], colNums: list[list[int]], bits: BitBoard, dirtyRows: int | None = None, dirtyCols: int | None = None) -> Conflict | None:
+        # Re-solves queued lines until no line changes, starting from every line unless told otherwise.
+        # Only lines crossing a newly settled tile are queued again. Lines with the least slack
+        # settle the most tiles, so they are solved first. Stops at the first line that can't
+        # meet its nums and returns it.
+        if dirtyRows == None:
+            dirtyRows = BitBoard.fullMask(bits.height)
+        if dirtyCols == None:
+            dirtyCols = BitBoard.fullMask(bits.width)
+        queue: list[tuple[int, bool, int]] = []
+        queuedRows: int = 0
+        queuedCols: int = 0
+        while True:
+            dirtyRows &= ~queuedRows
+            dirtyCols &= ~queuedCols
+            queuedRows |= dirtyRows
+            queuedCols |= dirtyCols
+            while dirtyRows:
+                low: int = dirtyRows & -dirtyRows
+                y: int = low.bit_length() - 1
+                heapq.heappush(queue, (bits.width - Engine.minLength(rowNums[y]), True, y))
+                dirtyRows ^= low
+            while dirtyCols:
+                low: int = dirtyCols & -dirtyCols
+                x: int = low.bit_length() - 1
+                heapq.heappush(queue, (bits.height - Engine.minLength(colNums[x]), False, x))
+                dirtyCols ^= low
+            if not queue:
+                return None
+            
+            _, isRow, index = heapq.heappop(queue)
+            bits.lineSolves += 1
+            line: tuple[int, int] | None
+            if isRow:
+                queuedRows &= ~(1 << index)
+                line = Engine.cachedSolveLine(bits.width, bits.rowFilled[index], bits.rowEmpty[index], rowNums[index])
+                if line == None:
+                    return (True, index)
+                dirtyCols = bits.setRow(index, *line)
+            else:
+                queuedCols &= ~(1 << index)
+                line = Engine.cachedSolveLine(bits.height, bits.colFilled[index], bits.colEmpty[index], colNums[index])
+                if line == None:
+                    return (False, index)
+                dirtyRows = bits.setCol(index, *line)
+    
+    @staticmethod
+    def sweepBoards(puzzles: list[tuple[list[list[int]], list[list[int]], BitBoard]]) -> list[Conflict | None]:
+        # Solves every board in place with LineBatch: each dirty row of every board at once, then
+        # each dirty column, until no line changes. Lines of the same length share a batch, so the
+        # more boards are swept together the cheaper each line gets. Returns the first line each
+        # board was found to contradict, or None for boards still valid; boards that contradict
+        # their nums stop being swept. Needs numpy, which is only imported here so that importing
+        # the engine stays cheap.
+        from linebatch import LineBatch
+        if not LineBatch.available():
+            raise Exception("Batched line solving needs numpy")
+        dirty: list[list[int]] = [[BitBoard.fullMask(bits.height), BitBoard.fullMask(bits.width)] for _, _, bits in puzzles]
+        conflicts: list[Conflict | None] = [None] * len(puzzles)
+        rows: bool = True
+        while any(dirtyRows or dirtyCols for dirtyRows, dirtyCols in dirty):
+            side: int = 0 if rows else 1
+            batches: dict[int, list[tuple[int, int]]] = {}
+            for i, (rowNums, colNums, bits) in enumerate(puzzles):
+                mask: int = dirty[i][side]
+                dirty[i][side] = 0
+                length: int = bits.width if rows else bits.height
+                while mask:
+                    low: int = mask & -mask
+                    batches.setdefault(length, []).append((i, low.bit_length() - 1))
+                    mask ^= low
+            for length, lines in batches.items():
+                filled: list[int] = []
+                empty: list[int] = []
+                nums: list[list[int]] = []
+                for i, index in lines:
+                    rowNums, colNums, bits = puzzles[i]
+                    filled.append(bits.rowFilled[index] if rows else bits.colFilled[index])
+                    empty.append(bits.rowEmpty[index] if rows else bits.colEmpty[index])
+                    nums.append(rowNums[index] if rows else colNums[index])
+                    bits.lineSolves += 1
+                outFilled, outEmpty, lineValid = LineBatch.solveInts(length, filled, empty, nums)
+                for (i, index), lineFilled, lineEmpty, isValid in zip(lines, outFilled, outEmpty, lineValid):
+                    if conflicts[i] != None:
+                        continue
+                    if not isValid:
+                        conflicts[i] = (rows, index)
+                        dirty[i] = [0, 0]
+                        continue
+                    bits: BitBoard = puzzles[i][2]
+                    if rows:
+                        dirty[i][1] |= bits.setRow(index, lineFilled, lineEmpty)
+                    else:
+                        dirty[i][0] |= bits.setCol(index, lineFilled, lineEmpty)
+            rows = not rows
+        return conflicts
+
+    @staticmethod
+    def sweepBits(rowNums: list[list[int]], colNums: list[list[int]], bits: BitBoard) -> Conflict | None:
+        # propagate for a single board by whole sweeps
+        return Engine.sweepBoards([(rowNums, colNums, bits)])[0]
+
+    @staticmethod
+    def minLength(nums: list[int]) -> int:
+        if nums == [0]:
+            return 0
+        return sum(nums) + len(nums) - 1
+    
+    @staticmethod
+    def boardToBits(rowNums: list[list[int]], colNums: list[list[int]], board: list[list[int]] | None = None) -> BitBoard:
+        if board == None:
+            return BitBoard(len(colNums), len(rowNums))
+        return BitBoard.fromList(board)
+    
+    @staticmethod
+    def printBoard(board: list[list[int]]):
+        for y in range(len(board[0])):
+            for x in range(len(board)):
+                print(VISUALS[board[x][y]], end = "")
+            print("")
+        return
+    
+    @staticmethod
+    def boardIsValid(rowNums: list[list[int]], colNums: list[list[int]], board: list[list[int]] | None = None) -> bool:
+        return Engine.solveStatus(rowNums, colNums, board).isValid()
+    
+    @staticmethod
+    def boardIsSolvable(rowNums: list[list[int]], colNums: list[list[int]], board: list[list[int]] | None = None, stats: SolverStats | None = None) -> bool:
+        with Engine.collectStats(stats):
+            if board != None:
+                return Engine.solveStatus(rowNums, colNums, board).isSolved()
+            return Engine.emptyIsSolvable(rowNums, colNums)
+    
+    @staticmethod
+    def emptyIsSolvable(rowNums: list[list[int]], colNums: list[list[int]]) -> bool:
+        # Whether the solver gets through these nums from an empty board, asking the solve cache first
+        cached: CachedSolve | None = Engine.lookupSolve(rowNums, colNums)
+        if cached != None:
+            return cached[0] == STATUSES["SOLVED"]
+        result: SolveResult = Engine.solveBits(rowNums, colNums, BitBoard(len(colNums), len(rowNums)))
+        Engine.recordSolve(rowNums, colNums, result)
+        return result.isSolved()
+    
+    @staticmethod
+    def bitsAreValid(rowNums: list[list[int]], colNums: list[list[int]], bits: BitBoard) -> bool:
+        result: SolveResult = Engine.solveBits(rowNums, colNums, bits.copy())
+        bits.lineSolves = result.bits.lineSolves
+        return result.isValid()
+    
+    @staticmethod
+    def bitsAreSolvable(rowNums: list[list[int]], colNums: list[list[int]], bits: BitBoard) -> bool:
+        return Engine.solveBits(rowNums, colNums, bits.copy()).isSolved()
+    
+    @staticmethod
+    def solveBoardComplete(rowNums: list[list[int]], colNums: list[list[int]], board: list[list[int]] | None = None, stats: SolverStats | None = None, workers: int = 1) -> list[list[int]]:
+        # The solution when there is exactly one, otherwise every tile settled by probing
+        if stats != None:
+            with Engine.collectStats(stats):
+                return Engine.solveBoardComplete(rowNums, colNums, board, workers = workers)
+        bits: BitBoard = Engine.boardToBits(rowNums, colNums, board)
+        solutions: list[BitBoard] = Engine.findSolutions(rowNums, colNums, bits, 2, workers)
+        if len(solutions) == 0:
+            raise Exception("Board has no solution")
+        if len(solutions) == 1:
+            return solutions[0].toList()
+        Engine.propagate(rowNums, colNums, bits)
+        Engine.probeParallel(rowNums, colNums, bits, workers)
+        return bits.toList()
+    
+    @staticmethod
+    def countSolutions(rowNums: list[list[int]], colNums: list[list[int]], board: list[list[int]] | None = None, limit: int = 2, stats: SolverStats | None = None, workers: int = 1) -> int:
+        with Engine.collectStats(stats):
+            return len(Engine.findSolutions(rowNums, colNums, Engine.boardToBits(rowNums, colNums, board), limit, workers))
+    
+    @staticmethod
+    def boardIsUnique(rowNums: list[list[int]], colNums: list[list[int]], board: list[list[int]] | None = None) -> bool:
+        return Engine.bitsAreUnique(rowNums, colNums, Engine.boardToBits(rowNums, colNums, board))
+    
+    @staticmethod
+    def bitsAreUnique(rowNums: list[list[int]], colNums: list[list[int]], bits: BitBoard) -> bool:
+        return len(Engine.findSolutions(rowNums, colNums, bits, 2)) == 1
+    
+    @staticmethod
+    def findSolutions(rowNums: list[list[int]], colNums: list[list[int]], bits: BitBoard, limit: int, workers: int = 1) -> list[BitBoard]:
+        # Probes the root to a fixed point over workers, then searches depth first with propagation
+        # and a single probing pass at every node until limit solutions are found
+        solutions: list[BitBoard] = []
+        root: BitBoard = bits.copy()
+        if Engine.propagate(rowNums, colNums, root) != None or not Engine.probeParallel(rowNums, colNums, root, workers):
+            return solutions
+        stack: list[tuple[BitBoard, int, int]] = [(root, 0, 0)]
+        while stack and len(solutions) < limit:
+            node, dirtyRows, dirtyCols = stack.pop()
+            branch: Branch | None = None
+            if Engine.propagate(rowNums, colNums, node, dirtyRows, dirtyCols) != None:
+                continue
+            if node.countUnknown() != 0:
+                isValid, branch = Engine.probeBits(rowNums, colNums, node, repeat = False)
+                if not isValid:
+                    continue
+            if node.countUnknown() == 0:
+                solutions.append(node)
+                continue
+            if branch == None:
+                branch = (*Engine.pickBranchTile(node), STATES["FLAGGED"])
+            x, y, first = branch
+            hypoOther: BitBoard = node.copy()
+            hypoOther.setTile(x, y, -first)
+            node.setTile(x, y, first)
+            stack.append((hypoOther, 1 << y, 1 << x))
+            stack.append((node, 1 << y, 1 << x))
+        return solutions
+    
+    @staticmethod
+    def probeBits(rowNums: list[list[int]], colNums: list[list[int]], bits: BitBoard, repeat: bool = True) -> tuple[bool, Branch | None]:
+        # Tries both values of every unknown tile on a propagated board, see probeTiles. Without
+        # repeat only one pass is made over the tiles. Returns False if both values of some tile
+        # contradict. Otherwise returns True with the best place to guess from the last pass
+        branch: Branch | None = None
+        progress: bool = True
+        while progress:
+            isValid, progress, branch = Engine.probeEach(rowNums, colNums, bits, ((x, y) for x in range(bits.width) for y in range(bits.height)))
+            if not isValid:
+                return False, None
+            progress = progress and repeat
+        return True, branch
+    
+    @staticmethod
+    def probeParallel(rowNums: list[list[int]], colNums: list[list[int]], bits: BitBoard, workers: int | None = None) -> bool:
+        # probeBits to a fixed point with each pass over the unknown tiles spread over a process
+        # pool. Workers get bits as column masks with a share of the tiles, and send back what
+        # their tiles settle. That is merged into bits and propagated before the next pass, until
+        # a pass settles nothing. Small boards, and boards once they get small, are probed
+        # serially. Returns False if some tile contradicts both ways.
+        if workers == None:
+            workers = os.cpu_count() or 1
+        if workers <= 1 or bits.countUnknown() < PARALLEL_PROBE_MIN_UNKNOWN:
+            return Engine.probeBits(rowNums, colNums, bits)[0]
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers = workers)
+        try:
+            while bits.countUnknown() >= PARALLEL_PROBE_MIN_UNKNOWN:
+                tiles: list[tuple[int, int]] = [(x, y) for x in range(bits.width) for y in range(bits.height) if not (bits.colFilled[x] | bits.colEmpty[x]) >> y & 1]
+                # Neighbouring tiles tend to cost about the same, so they're dealt out in turn
+                shares: int = min(len(tiles), workers)
+                futures = [pool.submit(Engine.probeTiles, rowNums, colNums, bits.height, bits.colFilled, bits.colEmpty, tiles[i::shares]) for i in range(shares)]
+                dirtyRows: int = 0
+                dirtyCols: int = 0
+                for future in futures:
+                    learned: tuple[list[int], list[int]] | None = future.result()
+                    if learned == None:
+                        return False
+                    changedRows, changedCols = bits.include(BitBoard.fromColumns(bits.height, *learned))
+                    dirtyRows |= changedRows
+                    dirtyCols |= changedCols
+                if not (dirtyRows or dirtyCols):
+                    return True
+                # Workers learn from the same board, so they can only disagree on a board with no solution
+                if any(bits.colFilled[x] & bits.colEmpty[x] for x in range(bits.width)):
+                    return False
+                if Engine.propagate(rowNums, colNums, bits, dirtyRows, dirtyCols) != None:
+                    return False
+        finally:
+            pool.shutdown(wait = False, cancel_futures = True)
+        return Engine.probeBits(rowNums, colNums, bits)[0]
+    
+    @staticmethod
+    def probeTiles(rowNums: list[list[int]], colNums: list[list[int]], height: int, colFilled: list[int], colEmpty: list[int], tiles: list[tuple[int, int]]) -> tuple[list[int], list[int]] | None:
+        # Runs in a pool worker. Probes the tiles in turn as probeBits does on the board given by
+        # the column masks, and returns its column masks once they're done. None if some tile
+        # contradicts both ways.
+        bits: BitBoard = BitBoard.fromColumns(height, colFilled, colEmpty)
+        if not Engine.probeEach(rowNums, colNums, bits, tiles)[0]:
+            return None
+        return bits.colFilled, bits.colEmpty
+    
+    @staticmethod
+    def probeEach(rowNums: list[list[int]], colNums: list[list[int]], bits: BitBoard, tiles: Iterable[tuple[int, int]]) -> tuple[bool, bool, Branch | None]:
+        # One pass over the tiles, trying both values of each one still unknown. A value that leads
+        # to a contradiction settles the tile the other way, and tiles that come out the same under
+        # both values are settled too. Returns whether no tile contradicted both ways, whether
+        # anything was settled, and the tile whose two values settle the most between them since
+        # bits last changed, with the value that settles less, as the best place to guess
+        settled: bool = False
+        branch: Branch | None = None
+        bestScore: int = -1
+        unknown: int = bits.countUnknown()
+        # A tile value seen in a consistent hypothesis can't contradict until bits learns more
+        safeFilled: list[int] = [0] * bits.width
+        safeEmpty: list[int] = [0] * bits.width
+        for x, y in tiles:
+            if (bits.colFilled[x] | bits.colEmpty[x]) >> y & 1:
+                continue
+            minedIsSafe: bool = bool(safeFilled[x] >> y & 1)
+            flaggedIsSafe: bool = bool(safeEmpty[x] >> y & 1)
+            if minedIsSafe and flaggedIsSafe:
+                continue
+            hypoMined: BitBoard | None = None if minedIsSafe else Engine.tryTile(rowNums, colNums, bits, x, y, STATES["MINED"])
+            hypoFlagged: BitBoard | None = None if flaggedIsSafe else Engine.tryTile(rowNums, colNums, bits, x, y, STATES["FLAGGED"])
+            minedFails: bool = not minedIsSafe and hypoMined == None
+            flaggedFails: bool = not flaggedIsSafe and hypoFlagged == None
+            if minedFails and flaggedFails:
+                return False, settled, None
+            
+            dirtyRows: int = 0
+            dirtyCols: int = 0
+            if minedFails or flaggedFails:
+                learned: BitBoard | None = hypoMined if flaggedFails else hypoFlagged
+                if learned == None:
+                    bits.setTile(x, y, STATES["FLAGGED"] if minedFails else STATES["MINED"])
+                    dirtyRows, dirtyCols = 1 << y, 1 << x
+                else:
+                    dirtyRows, dirtyCols = bits.include(learned)
+            elif hypoMined != None and hypoFlagged != None:
+                dirtyRows, dirtyCols = bits.include(BitBoard.common(hypoMined, hypoFlagged))
+            
+            if dirtyRows or dirtyCols:
+                if Engine.propagate(rowNums, colNums, bits, dirtyRows, dirtyCols) != None:
+                    return False, settled, None
+                settled = True
+                safeFilled = [0] * bits.width
+                safeEmpty = [0] * bits.width
+                branch, bestScore = None, -1
+                unknown = bits.countUnknown()
+                continue
+            if hypoMined != None and hypoFlagged != None:
+                minedSettles: int = unknown - hypoMined.countUnknown()
+                flaggedSettles: int = unknown - hypoFlagged.countUnknown()
+                score: int = (minedSettles + 1) * (flaggedSettles + 1)
+                if score > bestScore:
+                    bestScore = score
+                    branch = (x, y, STATES["MINED"] if minedSettles < flaggedSettles else STATES["FLAGGED"])
+            for hypo in (hypoMined, hypoFlagged):
+                if hypo != None:
+                    for i in range(bits.width):
+                        safeFilled[i] |= hypo.colFilled[i]
+                        safeEmpty[i] |= hypo.colEmpty[i]
+        return True, settled, branch
+    
+    @staticmethod
+    def tryTile(rowNums: list[list[int]], colNums: list[list[int]], bits: BitBoard, x: int, y: int, state: int) -> BitBoard | None:
+        hypo: BitBoard = bits.copy()
+        hypo.setTile(x, y, state)
+        if Engine.propagate(rowNums, colNums, hypo, 1 << y, 1 << x) != None:
+            return None
+        return hypo
+    
+    @staticmethod
+    def pickBranchTile(bits: BitBoard) -> tuple[int, int]:
+        # The first unknown tile of the row with the fewest unknowns
+        bestUnknown: int = 0
+        for y in range(bits.height):
+            unknown: int = BitBoard.fullMask(bits.width) & ~(bits.rowFilled[y] | bits.rowEmpty[y])
+            if unknown and (bestUnknown == 0 or unknown.bit_count() < bestUnknown.bit_count()):
+                bestUnknown = unknown
+                bestY: int = y
+        return (bestUnknown & -bestUnknown).bit_length() - 1, bestY
+    
+    @staticmethod
+    def generateBoard(width: int, height: int, fillPercent: float, unique: bool = False, rng: random.Random | None = None, stats: SolverStats | None = None) -> list[list[int]]:
+        # With unique set, boards that need guessing are kept as long as they have one solution.
+        # When numpy is there, candidates after the first CANDIDATE_BATCH_AFTER are drawn in
+        # batches, so from then on the same rng gives a different board with numpy than without.
+        if stats != None:
+            # Called again through Engine so the generation itself is timed too
+            with Engine.collectStats(stats):
+                return Engine.generateBoard(width, height, fillPercent, unique, rng)
+        if width * height >= REPAIR_MIN_TILES:
+            return Engine.repairBoard(width, height, fillPercent, unique, rng)
+        attempts: int = 1
+        currFillPercent: float = fillPercent
+        new_board: BitBoard = Engine.randomBits(width, height, currFillPercent, rng)
+        while not Engine.candidateIsAccepted(new_board, unique):
+            if NUMPY_AVAILABLE and attempts == CANDIDATE_BATCH_AFTER:
+                return Engine.generateBatched(width, height, currFillPercent, unique, rng, attempts)
+            if attempts == MAX_GENERATE_ATTEMPTS:
+                currFillPercent = 1.0 - (1.0 - DIFFICULTY_INCREMENT) * (1.0 - currFillPercent)
+                attempts = 0
+            attempts += 1
+            new_board = Engine.randomBits(width, height, currFillPercent, rng)
+        return new_board.toList()
+    
+    @staticmethod
+    def generateBatched(width: int, height: int, fillPercent: float, unique: bool = False, rng: random.Random | None = None, attempts: int = 0) -> list[list[int]]:
+        # generateBoard with candidates drawn by CandidateBatch from a numpy generator seeded from
+        # rng, and their nums handed straight to the solver. attempts is how many candidates were
+        # already turned down at fillPercent. Batches grow from CANDIDATE_BATCH_AFTER to
+        # CANDIDATE_BATCH_SIZE, and the fill goes up after the same number of attempts. Needs numpy.
+        from candidatebatch import CandidateBatch
+        if not CandidateBatch.available():
+            raise Exception("Batched generation needs numpy")
+        generator = CandidateBatch.generator(None if rng == None else rng.getrandbits(64))
+        currFillPercent: float = fillPercent
+        batchSize: int = CANDIDATE_BATCH_AFTER
+        while True:
+            batch = CandidateBatch(generator, min(batchSize, MAX_GENERATE_ATTEMPTS - attempts), width, height, currFillPercent)
+            batchSize = min(2 * batchSize, CANDIDATE_BATCH_SIZE)
+            density: float = round(currFillPercent, 4)
+            for i in range(len(batch)):
+                if Engine.stats != None:
+                    Engine.stats.densities[density] = Engine.stats.densities.get(density, 0) + 1
+                if Engine.numsAreAccepted(*batch.nums(i), unique):
+                    return BitBoard.fromColumns(height, batch.colFilled(i)).toList()
+            attempts += len(batch)
+            if attempts == MAX_GENERATE_ATTEMPTS:
+                currFillPercent = Engine.escalateFillPercent(currFillPercent, 1)
+                attempts = 0
+    
+    @staticmethod
+    def repairBoard(width: int, height: int, fillPercent: float, unique: bool = False, rng: random.Random | None = None) -> list[list[int]]:
+        # Draws one board, then repairs it where the solver gets stuck instead of drawing again:
+        # a few of the tiles left unknown are flipped, and solving carries on from what was known.
+        # The tiles kept still match the solution but may no longer follow from the new nums, so
+        # a board that looks solved is only accepted after a full solve. The mine count is kept
+        # within REPAIR_TOLERANCE of fillPercent, and only creeps up as in generateBoard if
+        # repairs stop getting anywhere.
+        draw = random if rng == None else rng
+        area: int = width * height
+        solution: BitBoard = Engine.randomBits(width, height, fillPercent, rng)
+        rowNums: list[list[int]] = Engine.getListRowNums(solution)
+        colNums: list[list[int]] = Engine.getListColNums(solution)
+        mined: int = sum(filled.bit_count() for filled in solution.colFilled)
+        target: int = round(fillPercent * area)
+        tolerance: int = max(1, round(REPAIR_TOLERANCE * area))
+        bits = BitBoard(width, height)
+        Engine.propagate(rowNums, colNums, bits)
+        exact: bool = True
+        steps: int = 0
+        while True:
+            unknown: int = bits.countUnknown()
+            if abs(mined - target) <= tolerance and unknown <= MAX_UNKNOWN_TOLERANCE:
+                if (exact and unknown == 0) or Engine.candidateIsAccepted(solution, unique):
+                    return solution.toList()
+                if not exact:
+                    bits = BitBoard(width, height)
+                    Engine.propagate(rowNums, colNums, bits)
+                    exact = True
+                    continue
+            
+            steps += 1
+            if steps % area == 0:
+                target = round(Engine.escalateFillPercent(fillPercent, steps // area) * area)
+            # Flip among the unknown tiles, or anywhere once none are left
+            tiles: list[tuple[int, int]] = [(x, y) for x in range(width) for y in range(height) if unknown == 0 or not (bits.colFilled[x] | bits.colEmpty[x]) >> y & 1]
+            minedTiles: list[tuple[int, int]] = [(x, y) for x, y in tiles if solution.colFilled[x] >> y & 1]
+            emptyTiles: list[tuple[int, int]] = [(x, y) for x, y in tiles if not solution.colFilled[x] >> y & 1]
+            best: tuple[int, BitBoard, BitBoard, list[list[int]], list[list[int]], int] | None = None
+            for _ in range(REPAIR_TRIES):
+                trial = Engine.tryRepair(rowNums, colNums, solution, bits, minedTiles, emptyTiles, mined, target, tolerance, draw)
+                if best == None or trial[0] < best[0]:
+                    best = trial
+            _, solution, bits, rowNums, colNums, mined = best
+            exact = False
+    
+    @staticmethod
+    def tryRepair(rowNums: list[list[int]], colNums: list[list[int]], solution: BitBoard, bits: BitBoard, minedTiles: list[tuple[int, int]], emptyTiles: list[tuple[int, int]], mined: int, target: int, tolerance: int, draw: random.Random) -> tuple[int, BitBoard, BitBoard, list[list[int]], list[list[int]], int]:
+        # Flips REPAIR_FLIPS tiles of a copy of solution, steering the mine count towards target,
+        # then re-solves only the lines through them on a copy of bits. Returns the tiles left
+        # unknown with the new solution, knowledge, nums and mine count.
+        solution, bits = solution.copy(), bits.copy()
+        rowNums, colNums = rowNums[:], colNums[:]
+        dirtyRows: int = 0
+        dirtyCols: int = 0
+        for _ in range(REPAIR_FLIPS):
+            if mined >= target + tolerance:
+                pool = minedTiles or emptyTiles
+            elif mined <= target - tolerance:
+                pool = emptyTiles or minedTiles
+            else:
+                pool = minedTiles if draw.random() * (len(minedTiles) + len(emptyTiles)) < len(minedTiles) else emptyTiles
+            x, y = draw.choice(pool)
+            mined += -1 if solution.colFilled[x] >> y & 1 else 1
+            solution.flipTile(x, y)
+            bits.forgetTile(x, y)
+            rowNums[y] = Engine.getMaskNums(solution.width, solution.rowFilled[y], solution.rowEmpty[y])
+            colNums[x] = Engine.getMaskNums(solution.height, solution.colFilled[x], solution.colEmpty[x])
+            dirtyRows |= 1 << y
+            dirtyCols |= 1 << x
+        Engine.propagate(rowNums, colNums, bits, dirtyRows, dirtyCols)
+        return bits.countUnknown(), solution, bits, rowNums, colNums, mined
+    
+    @staticmethod
+    def drawFromBank(width: int, height: int, fillPercent: float, path: str = PUZZLE_BANK_PATH) -> list[list[int]] | None:
+        with PuzzleBank(path) as bank:
+            puzzle = bank.draw(width, height, fillPercent)
+        if puzzle == None:
+            return None
+        return BitBoard.fromColumns(height, puzzle[0]).toList()
+    
+    @staticmethod
+    def fillBank(width: int, height: int, fillPercent: float, count: int, workers: int = 1, path: str = PUZZLE_BANK_PATH) -> None:
+        # Generates count puzzles of one size and difficulty and adds them to the bank
+        seeds: list[str] = [str(random.randrange(1 << 63)) for _ in range(count)]
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers = workers) as pool:
+                solutions: list[list[int]] = list(pool.map(Engine.generateSeeded, [width] * count, [height] * count, [fillPercent] * count, seeds, chunksize = max(1, count // (4 * workers))))
+        else:
+            solutions = [Engine.generateSeeded(width, height, fillPercent, seed) for seed in seeds]
+        records: list[bytes] = []
+        for colFilled in solutions:
+            bits: BitBoard = BitBoard.fromColumns(height, colFilled)
+            records.append(PuzzleBank.encode(width, height, colFilled, Engine.getListRowNums(bits), Engine.getListColNums(bits)))
+        PuzzleBank.append(path, (width, height, PuzzleBank.bucket(fillPercent)), records)
+    
+    @staticmethod
+    def generateSeeded(width: int, height: int, fillPercent: float, seed: str) -> list[int]:
+        # Runs in a pool worker; returns the mined column masks of a generated board
+        return BitBoard.fromList(Engine.generateBoard(width, height, fillPercent, rng = random.Random(seed))).colFilled
+    
+    @staticmethod
+    def generateBoardParallel(width: int, height: int, fillPercent: float, workers: int | None = None, seed: int | None = None, unique: bool = False, stats: SolverStats | None = None) -> list[list[int]]:
+        # Candidate attempts are spread over a process pool. Attempt k is sampled from its own
+        # seed and at the density generateBoard would use for it, and the lowest accepted attempt
+        # wins, so the result depends only on seed and not on the worker count or scheduling.
+        # With stats, workers collect their own and the ones for attempts waited on are merged in.
+        from concurrent.futures import Future, ProcessPoolExecutor
+        if stats != None:
+            with Engine.collectStats(stats):
+                return Engine.generateBoardParallel(width, height, fillPercent, workers, seed, unique)
+        if workers == None:
+            workers = os.cpu_count() or 1
+        if seed == None:
+            seed = random.randrange(1 << 63)
+        inFlight: int = 4 * workers
+        pending: list[Future[tuple[list[int] | None, SolverStats | None]]] = []
+        attempt: int = 0
+        pool = ProcessPoolExecutor(max_workers = workers)
+        try:
+            while True:
+                while len(pending) < inFlight:
+                    density: float = Engine.escalateFillPercent(fillPercent, attempt // MAX_GENERATE_ATTEMPTS)
+                    pending.append(pool.submit(Engine.tryCandidateWithStats, width, height, density, f"{seed}-{attempt}", unique, Engine.stats != None))
+                    attempt += 1
+                colFilled, workerStats = pending.pop(0).result()
+                if workerStats != None and Engine.stats != None:
+                    Engine.stats.merge(workerStats)
+                if colFilled != None:
+                    return BitBoard.fromColumns(height, colFilled).toList()
+        finally:
+            pool.shutdown(wait = False, cancel_futures = True)
+    
+    @staticmethod
+    def tryCandidate(width: int, height: int, fillPercent: float, seed: str, unique: bool) -> list[int] | None:
+        # Runs in a pool worker; returns the mined column masks of an accepted candidate
+        solution: BitBoard = Engine.randomBits(width, height, fillPercent, random.Random(seed))
+        if Engine.candidateIsAccepted(solution, unique):
+            return solution.colFilled
+        return None
+    
+    @staticmethod
+    def tryCandidateWithStats(width: int, height: int, fillPercent: float, seed: str, unique: bool, collect: bool) -> tuple[list[int] | None, SolverStats | None]:
+        # Runs in a pool worker; tryCandidate along with the worker's stats for it when collecting
+        stats: SolverStats | None = SolverStats() if collect else None
+        with Engine.collectStats(stats):
+            return Engine.tryCandidate(width, height, fillPercent, seed, unique), stats
+    
+    @staticmethod
+    def escalateFillPercent(fillPercent: float, steps: int) -> float:
+        for _ in range(steps):
+            fillPercent = 1.0 - (1.0 - DIFFICULTY_INCREMENT) * (1.0 - fillPercent)
+        return fillPercent
+    
+    @staticmethod
+    def candidateIsAccepted(solution: BitBoard, unique: bool) -> bool:
+        return Engine.numsAreAccepted(Engine.getListRowNums(solution), Engine.getListColNums(solution), unique)
+    
+    @staticmethod
+    def numsAreAccepted(rowNums: list[list[int]], colNums: list[list[int]], unique: bool) -> bool:
+        if Engine.emptyIsSolvable(rowNums, colNums):
+            return True
+        if not unique:
+            return False
+        cached: CachedSolve | None = Engine.lookupSolve(rowNums, colNums)
+        if cached != None and cached[1] != None:
+            return cached[1]
+        isUnique: bool = Engine.bitsAreUnique(rowNums, colNums, BitBoard(len(colNums), len(rowNums)))
+        if Engine.solveCache != None:
+            Engine.solveCache.put(rowNums, colNums, STATUSES["STUCK"], isUnique)
+        return isUnique
+    
+    @staticmethod
+    def randomBits(width: int, height: int, fillPercent: float, rng: random.Random | None = None) -> BitBoard:
+        draw = random.random if rng == None else rng.random
+        bits = BitBoard(width, height)
+        for i in range(width):
+            for j in range(height):
+                bits.setTile(i, j, STATES["MINED"] if draw() <= fillPercent else STATES["FLAGGED"])
+        return bits
+    
+    @staticmethod
+    def getListCol(board: list[list[int]], colIndex: int) -> list[int]:
+        return board[colIndex]
+    
+    @staticmethod
+    def getListRow(board: list[list[int]], rowIndex: int) -> list[int]:
+        outRow: list[int] = list()
+        for col in board:
+            outRow.append(col[rowIndex])
+        return outRow
+    
+    @staticmethod
+    def getListRowNums(board: list[list[int]] | BitBoard) -> list[list[int]]:
+        if isinstance(board, BitBoard):
+            return [Engine.getMaskNums(board.width, board.rowFilled[y], board.rowEmpty[y]) for y in range(board.height)]
+        outList: list[list[int]] = list()
+        for y in range(len(board[0])):
+            outList.append(Engine.getListNums(Engine.getListRow(board, y)))
+        return outList
+    
+    @staticmethod
+    def getListColNums(board: list[list[int]] | BitBoard) -> list[list[int]]:
+        if isinstance(board, BitBoard):
+            return [Engine.getMaskNums(board.height, board.colFilled[x], board.colEmpty[x]) for x in range(board.width)]
+        outList: list[list[int]] = list()
+        for x in range(len(board)):
+            outList.append(Engine.getListNums(Engine.getListCol(board, x)))
+        return outList
+    
+    @staticmethod
+    def getMaskNums(length: int, filled: int, empty: int) -> list[int]:
+        if (filled | empty) != BitBoard.fullMask(length):
+            raise Exception("Can't get list nums for a list with unknown tiles")
+        outnums: list[int] = []
+        while filled:
+            filled >>= (filled & -filled).bit_length() - 1
+            run: int = (~filled & (filled + 1)).bit_length() - 1
+            outnums.append(run)
+            filled >>= run
+        if len(outnums) == 0:
+            outnums.append(0)
+        return outnums
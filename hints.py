@@ -0,0 +1,82 @@
+from engine import Engine, BitBoard, STATES, MAX_UNKNOWN_TOLERANCE
+
+# Dirty lines re-solved per refresh while the game is idle
+HINT_REFRESH_BUDGET: int = 16
+
+# A hinted tile, its state, and the line that proves it: (x, y, state, isRow, index).
+# The line is None when no single line proves anything and probing settled the tile instead.
+Hint = tuple[int, int, int, bool | None, int | None]
+
+class HintEngine():
+    # Keeps what each line alone settles beyond the tiles the player knows. The player's tiles
+    # arrive one at a time through setTile, so only the two lines through a changed tile have to
+    # be solved again, and idle frames can catch up on those before a hint is asked for.
+
+    def __init__(self, rowNums: list[list[int]], colNums: list[list[int]]):
+        self.rowNums: list[list[int]] = rowNums
+        self.colNums: list[list[int]] = colNums
+        self.bits = BitBoard(len(colNums), len(rowNums))
+        # Tiles each line settles that the player doesn't know yet, as filled and empty masks
+        self.rowSettles: list[tuple[int, int]] = [(0, 0)] * self.bits.height
+        self.colSettles: list[tuple[int, int]] = [(0, 0)] * self.bits.width
+        self.dirtyRows: int = BitBoard.fullMask(self.bits.height)
+        self.dirtyCols: int = BitBoard.fullMask(self.bits.width)
+        self.probed: Hint | None = None
+
+    def setTile(self, x: int, y: int, state: int) -> None:
+        self.bits.setTile(x, y, state)
+        self.dirtyRows |= 1 << y
+        self.dirtyCols |= 1 << x
+        self.probed = None
+
+    def refresh(self, budget: int | None = None) -> None:
+        # Re-solves up to budget dirty lines, or all of them
+        while (self.dirtyRows or self.dirtyCols) and budget != 0:
+            if self.dirtyRows:
+                low: int = self.dirtyRows & -self.dirtyRows
+                y: int = low.bit_length() - 1
+                filled, empty = Engine.solveLine(self.bits.width, self.bits.rowFilled[y], self.bits.rowEmpty[y], self.rowNums[y])
+                self.rowSettles[y] = (filled & ~self.bits.rowFilled[y], empty & ~self.bits.rowEmpty[y])
+                self.dirtyRows ^= low
+            else:
+                low: int = self.dirtyCols & -self.dirtyCols
+                x: int = low.bit_length() - 1
+                filled, empty = Engine.solveLine(self.bits.height, self.bits.colFilled[x], self.bits.colEmpty[x], self.colNums[x])
+                self.colSettles[x] = (filled & ~self.bits.colFilled[x], empty & ~self.bits.colEmpty[x])
+                self.dirtyCols ^= low
+            if budget != None:
+                budget -= 1
+
+    def hint(self) -> Hint | None:
+        # The line that settles the most unknown tiles on its own and the first tile it settles,
+        # or None once the board is solved
+        self.refresh()
+        best: Hint | None = None
+        bestCount: int = 0
+        for isRow, settles in ((True, self.rowSettles), (False, self.colSettles)):
+            for index, (filled, empty) in enumerate(settles):
+                count: int = (filled | empty).bit_count()
+                if count <= bestCount:
+                    continue
+                bestCount = count
+                tile: int = ((filled | empty) & -(filled | empty)).bit_length() - 1
+                state: int = STATES["MINED"] if filled >> tile & 1 else STATES["FLAGGED"]
+                best = (tile, index, state, True, index) if isRow else (index, tile, state, False, index)
+        if best == None and self.bits.countUnknown() > 0:
+            best = self.probe()
+        return best
+
+    def probe(self) -> Hint | None:
+        # No line settles anything by itself. The solver only guesses once line logic is down to
+        # MAX_UNKNOWN_TOLERANCE tiles, so on any board it accepted a tile is settled by trying
+        # both of its values here, and bigger stalls are left without a hint.
+        if self.probed == None and self.bits.countUnknown() <= MAX_UNKNOWN_TOLERANCE:
+            probed: BitBoard = self.bits.copy()
+            Engine.probeBits(self.rowNums, self.colNums, probed, False)
+            for x in range(probed.width):
+                settled: int = (probed.colFilled[x] | probed.colEmpty[x]) & ~(self.bits.colFilled[x] | self.bits.colEmpty[x])
+                if settled:
+                    y: int = (settled & -settled).bit_length() - 1
+                    self.probed = (x, y, probed.getTile(x, y), None, None)
+                    break
+        return self.probed
@@ -0,0 +1,235 @@
+from itertools import chain
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Lines are solved with the same reachability DP as Engine.computeLine, but on many lines at
+# once. A batch of line masks is an array of shape (limbs, lines): column i holds line i as 64
+# bit limbs, least significant limb first, and each step of the DP is a few array operations
+# over the whole batch. A line of length n needs bits 0..n for its reach masks, so it takes
+# (n + 64) // 64 limbs.
+LIMB_BITS: int = 64
+# The tile values of STATES in engine, which imports this module
+MINED: int = 1
+FLAGGED: int = -1
+# Every byte with its bits in reverse order
+REVERSED_BYTES = None if np == None else np.array([int(f"{byte:08b}"[::-1], 2) for byte in range(256)], dtype = np.uint8)
+
+class LineBatch():
+
+    @staticmethod
+    def available() -> bool:
+        return np != None
+
+    @staticmethod
+    def limbCount(length: int) -> int:
+        return (length + LIMB_BITS) // LIMB_BITS
+
+    @staticmethod
+    def fromInts(values: list[int], limbs: int) -> "np.ndarray":
+        size: int = 8 * limbs
+        data: bytes = b"".join(value.to_bytes(size, "little") for value in values)
+        return np.frombuffer(data, dtype = "<u8").reshape(len(values), limbs).T.astype(np.uint64)
+
+    @staticmethod
+    def toInts(masks: "np.ndarray") -> list[int]:
+        data: bytes = masks.T.astype("<u8").tobytes()
+        size: int = 8 * masks.shape[0]
+        return [int.from_bytes(data[i:i + size], "little") for i in range(0, len(data), size)]
+
+    @staticmethod
+    def packRows(bits: "np.ndarray", limbs: int) -> "np.ndarray":
+        # Bit arrays of shape (lines, length) to masks
+        packed = np.packbits(bits, axis = 1, bitorder = "little")
+        padded = np.zeros((bits.shape[0], 8 * limbs), dtype = np.uint8)
+        padded[:, :packed.shape[1]] = packed
+        return padded.view("<u8").T.astype(np.uint64)
+
+    @staticmethod
+    def unpackRows(masks: "np.ndarray", length: int) -> "np.ndarray":
+        return np.unpackbits(np.ascontiguousarray(masks.T, dtype = "<u8").view(np.uint8), axis = 1, count = length, bitorder = "little")
+
+    @staticmethod
+    def reverse(masks: "np.ndarray", length: int) -> "np.ndarray":
+        # Reverses bits 0..length-1 of every line: reverses the whole limbs, a byte at a time,
+        # then drops the padding that ends up below the line
+        limbs: int = masks.shape[0]
+        flipped = REVERSED_BYTES[np.ascontiguousarray(masks[::-1], dtype = "<u8").view(np.uint8)].view("<u8").byteswap()
+        return LineBatch.shiftShared(flipped.astype(np.uint64), LIMB_BITS * limbs - length, False)
+
+    @staticmethod
+    def lowMask(counts: "np.ndarray", limbs: int) -> "np.ndarray":
+        # Bits 0..counts[i]-1 of line i, with nothing set for counts of zero or less
+        bits = np.clip(counts - LIMB_BITS * np.arange(limbs)[:, None], 0, LIMB_BITS).astype(np.uint64)
+        partial = (np.uint64(1) << (bits & np.uint64(LIMB_BITS - 1))) - np.uint64(1)
+        return np.where(bits == LIMB_BITS, ~np.uint64(0), partial)
+
+    @staticmethod
+    def shift(masks: "np.ndarray", amounts: "np.ndarray | int", up: bool) -> "np.ndarray":
+        # Shifts every line towards its high bits, or its low bits, by its own amount or by a
+        # shared one. Bits shifted past either end are lost.
+        limbs: int = masks.shape[0]
+        amounts = np.asarray(amounts, dtype = np.uint64)
+        if limbs == 1:
+            if amounts.ndim == 0:
+                return masks << amounts if up else masks >> amounts
+            return np.where(amounts < LIMB_BITS, masks << amounts if up else masks >> amounts, np.uint64(0))
+        if amounts.ndim == 0:
+            return LineBatch.shiftShared(masks, int(amounts), up)
+        whole = amounts // np.uint64(LIMB_BITS)
+        part = amounts % np.uint64(LIMB_BITS)
+        # Shifting by the limb size is undefined, so carries are masked off for whole limb shifts
+        back = (np.uint64(LIMB_BITS) - part) % np.uint64(LIMB_BITS)
+        carries = part != 0
+        shifted = np.zeros_like(masks)
+        for limb in range(limbs):
+            for offset in range(limbs):
+                source: int = limb - offset if up else limb + offset
+                if not 0 <= source < limbs:
+                    break
+                moved = masks[source] << part if up else masks[source] >> part
+                neighbour: int = source - 1 if up else source + 1
+                if 0 <= neighbour < limbs:
+                    moved |= np.where(carries, masks[neighbour] >> back if up else masks[neighbour] << back, np.uint64(0))
+                shifted[limb] |= np.where(whole == offset, moved, np.uint64(0))
+        return shifted
+
+    @staticmethod
+    def shiftShared(masks: "np.ndarray", amount: int, up: bool) -> "np.ndarray":
+        # The shift for one amount across the whole batch, which needs no per line selects
+        limbs: int = masks.shape[0]
+        whole, part = divmod(amount, LIMB_BITS)
+        shifted = np.zeros_like(masks)
+        for limb in range(limbs):
+            source: int = limb - whole if up else limb + whole
+            if not 0 <= source < limbs:
+                continue
+            shifted[limb] = masks[source] << np.uint64(part) if up else masks[source] >> np.uint64(part)
+            neighbour: int = source - 1 if up else source + 1
+            if part and 0 <= neighbour < limbs:
+                shifted[limb] |= masks[neighbour] >> np.uint64(LIMB_BITS - part) if up else masks[neighbour] << np.uint64(LIMB_BITS - part)
+        return shifted
+
+    @staticmethod
+    def add(first: "np.ndarray", second: "np.ndarray") -> "np.ndarray":
+        if first.shape[0] == 1:
+            return first + second
+        total = np.empty_like(first)
+        carry = np.zeros(first.shape[1], dtype = np.uint64)
+        for limb in range(first.shape[0]):
+            partial = first[limb] + second[limb]
+            total[limb] = partial + carry
+            carry = ((partial < first[limb]) | (total[limb] < partial)).astype(np.uint64)
+        return total
+
+    @staticmethod
+    def flood(seeds: "np.ndarray", passable: "np.ndarray") -> "np.ndarray":
+        return seeds | (LineBatch.add(seeds & passable, passable) ^ passable)
+
+    @staticmethod
+    def smearUp(masks: "np.ndarray", lengths: "np.ndarray") -> "np.ndarray":
+        # Per line version of BitBoard.smearUp
+        span = np.ones(lengths.shape, dtype = np.int64)
+        while True:
+            step = np.maximum(np.minimum(span, lengths - span), 0)
+            if not step.any():
+                return masks
+            masks = masks | LineBatch.shift(masks, step, True)
+            span += step
+
+    @staticmethod
+    def blockFits(length: int, empty: "np.ndarray", sizes: "np.ndarray") -> list["np.ndarray"]:
+        # Per block version of Engine.blockFits. The smears of empty are built up one size at a
+        # time and looked up per line, which is cheaper than smearing for every block.
+        limbs, lines = empty.shape
+        largest: int = int(sizes.max()) if sizes.size else 0
+        smeared: list[np.ndarray] = [np.zeros_like(empty), empty]
+        for size in range(2, largest + 1):
+            smeared.append(smeared[-1] | LineBatch.shift(empty, size - 1, False))
+        table = np.stack(smeared, axis = 1)
+        everyLine = np.arange(lines)
+        return [LineBatch.lowMask(length - sizes[:, j] + 1, limbs) & ~table[:, sizes[:, j], everyLine] for j in range(sizes.shape[1])]
+
+    @staticmethod
+    def reachability(length: int, filled: "np.ndarray", empty: "np.ndarray", sizes: "np.ndarray") -> tuple[list["np.ndarray"], list["np.ndarray"]]:
+        # LineBatch version of Engine.lineReachability, also returning the block starts
+        # that were tried, which the forward pass reuses for placing blocks
+        limbs, lines = filled.shape
+        passable = LineBatch.lowMask(np.full(lines, length), limbs) & ~filled
+        reach: list[np.ndarray] = [LineBatch.flood(LineBatch.lowMask(np.ones(lines, dtype = np.int64), limbs), passable)]
+        starts: list[np.ndarray] = []
+        for j, fits in enumerate(LineBatch.blockFits(length, empty, sizes)):
+            blockStarts = reach[j] if j == 0 else LineBatch.shift(reach[j] & passable, 1, True)
+            starts.append(blockStarts & fits)
+            reach.append(LineBatch.flood(LineBatch.shift(starts[j], sizes[:, j], True), passable))
+        return reach, starts
+
+    @staticmethod
+    def clueArrays(nums: list[list[int]]) -> tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        # Block counts, and the clues padded with zeros to shape (lines, blocks) forwards and reversed
+        nums = [[] if row == [0] else row for row in nums]
+        counts = np.array([len(row) for row in nums], dtype = np.int64)
+        flat = np.fromiter(chain.from_iterable(nums), dtype = np.int64, count = int(counts.sum()))
+        lineOf = np.repeat(np.arange(len(nums)), counts)
+        blockOf = np.arange(len(flat)) - np.repeat(np.cumsum(counts) - counts, counts)
+        blocks: int = int(counts.max()) if len(nums) else 0
+        sizes = np.zeros((len(nums), blocks), dtype = np.int64)
+        reversedSizes = np.zeros((len(nums), blocks), dtype = np.int64)
+        sizes[lineOf, blockOf] = flat
+        reversedSizes[lineOf, counts[lineOf] - 1 - blockOf] = flat
+        return counts, sizes, reversedSizes
+
+    @staticmethod
+    def solveMasks(length: int, filled: "np.ndarray", empty: "np.ndarray", nums: list[list[int]]) -> tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        # Solves every line of filled and empty against its nums. Returns the settled filled and
+        # empty masks and whether each line is valid; the masks of invalid lines are meaningless.
+        limbs, lines = filled.shape
+        counts, sizes, reversedSizes = LineBatch.clueArrays(nums)
+        blocks: int = sizes.shape[1]
+        everyLine = np.arange(lines)
+        full = LineBatch.lowMask(np.full(lines, length), limbs)
+        passable = full & ~filled
+
+        fwd, starts = LineBatch.reachability(length, filled, empty, sizes)
+        topLimb, topBit = divmod(length, LIMB_BITS)
+        valid = (np.stack(fwd)[counts, topLimb, everyLine] >> np.uint64(topBit)) & np.uint64(1) == 1
+        rev, _ = LineBatch.reachability(length, LineBatch.reverse(filled, length), LineBatch.reverse(empty, length), reversedSizes)
+        # bwd[j] has bit i set when blocks j onward fit in the tiles from i to the end. Every
+        # reversed reach mask is flipped back in one go, then picked out per line.
+        flipped = LineBatch.reverse(np.concatenate(rev, axis = 1), length + 1)
+        bwd: list[np.ndarray] = [flipped[:, np.clip(counts - j, 0, blocks) * lines + everyLine] for j in range(blocks + 1)]
+
+        canFlag = np.zeros_like(filled)
+        for j in range(blocks + 1):
+            canFlag |= np.where(j <= counts, fwd[j] & LineBatch.shift(bwd[j], 1, False), np.uint64(0))
+        canFlag &= passable
+
+        canMine = np.zeros_like(filled)
+        end = LineBatch.shift(LineBatch.lowMask(np.ones(lines, dtype = np.int64), limbs), length, True)
+        for j in range(blocks):
+            ends = LineBatch.shift(bwd[j + 1], 1, False) & passable
+            ends |= np.where(j == counts - 1, end, np.uint64(0))
+            placed = LineBatch.smearUp(starts[j] & LineBatch.shift(ends, sizes[:, j], False), sizes[:, j])
+            canMine |= np.where(j < counts, placed, np.uint64(0))
+
+        return full & ~canFlag, full & ~canMine, valid
+
+    @staticmethod
+    def solveInts(length: int, filled: list[int], empty: list[int], nums: list[list[int]]) -> tuple[list[int], list[int], list[bool]]:
+        # solveMasks for lines given as the int masks BitBoard uses
+        limbs: int = LineBatch.limbCount(length)
+        outFilled, outEmpty, valid = LineBatch.solveMasks(length, LineBatch.fromInts(filled, limbs), LineBatch.fromInts(empty, limbs), nums)
+        return LineBatch.toInts(outFilled), LineBatch.toInts(outEmpty), valid.tolist()
+
+    @staticmethod
+    def solveStates(states: "np.ndarray", nums: list[list[int]]) -> tuple["np.ndarray", "np.ndarray"]:
+        # Solves a 2D array of tile states, one line per row, using the values in STATES.
+        # Returns the settled states and whether each line is valid.
+        length: int = states.shape[1]
+        limbs: int = LineBatch.limbCount(length)
+        filled = LineBatch.packRows(states == MINED, limbs)
+        empty = LineBatch.packRows(states == FLAGGED, limbs)
+        outFilled, outEmpty, valid = LineBatch.solveMasks(length, filled, empty, nums)
+        settled = MINED * LineBatch.unpackRows(outFilled, length).astype(np.int8) + FLAGGED * LineBatch.unpackRows(outEmpty, length).astype(np.int8)
+        return settled, valid
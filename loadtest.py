@@ -0,0 +1,150 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from engine import Engine, STATES
+from server import SERVER_HOST
+from session import EVENTS
+
+class Player():
+    # One session as the load test plays it: the solution worked out from the clues, and the
+    # tiles still unknown in a random order
+
+    def __init__(self, response: dict, rng: random.Random):
+        self.sessionId: int = response["session"]
+        self.width: int = response["width"]
+        self.height: int = response["height"]
+        self.solution: list[list[int]] = Engine.solveBoard(response["rows"], response["cols"])
+        self.known: set[tuple[int, int]] = set()
+        self.order: list[tuple[int, int]] = [(x, y) for x in range(self.width) for y in range(self.height)]
+        rng.shuffle(self.order)
+        self.done: bool = False
+        self.won: bool = False
+        self.update(response)
+
+    def update(self, response: dict) -> None:
+        for event in response["events"]:
+            if event[0] == EVENTS["TILE"]:
+                self.known.add((event[1], event[2]))
+        self.done = response["lost"] or response["won"]
+        self.won = response["won"]
+
+    def nextMove(self, mistakeRate: float, rng: random.Random) -> dict | None:
+        while self.order and self.order[-1] in self.known:
+            self.order.pop()
+        if not self.order:
+            return None
+        x, y = self.order.pop()
+        mined: bool = self.solution[x][y] == STATES["MINED"]
+        if rng.random() < mistakeRate:
+            mined = not mined
+        return {"op": "mine" if mined else "flag", "session": self.sessionId, "x": x, "y": y}
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, message: dict) -> dict:
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+    response: dict = json.loads(await reader.readline())
+    if "error" in response:
+        raise Exception(response["error"])
+    return response
+
+async def openConnection(host: str, port: int, sessions: int, args: argparse.Namespace, rng: random.Random) -> tuple[asyncio.StreamReader, asyncio.StreamWriter, list[Player]]:
+    # Asks for all of this connection's sessions at once
+    reader, writer = await asyncio.open_connection(host, port)
+    for i in range(sessions):
+        writer.write(json.dumps({"op": "new", "width": args.size, "height": args.size, "fill": args.fill, "id": i}).encode() + b"\n")
+    await writer.drain()
+    players: list[Player] = []
+    for _ in range(sessions):
+        response: dict = json.loads(await reader.readline())
+        if "error" in response:
+            raise Exception(response["error"])
+        players.append(Player(response, rng))
+    return reader, writer, players
+
+async def play(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, players: list[Player], mistakeRate: float, rng: random.Random, latencies: list[float]) -> None:
+    # Plays the connection's sessions in turn with one move in flight
+    playing: list[Player] = [player for player in players if not player.done]
+    while playing:
+        for player in playing:
+            move: dict | None = player.nextMove(mistakeRate, rng)
+            if move == None:
+                player.done = True
+                continue
+            start: float = time.perf_counter()
+            response: dict = await request(reader, writer, move)
+            latencies.append(time.perf_counter() - start)
+            player.update(response)
+        playing = [player for player in playing if not player.done]
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered: list[float] = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def freePort() -> int:
+    with socket.socket() as probe:
+        probe.bind((SERVER_HOST, 0))
+        return probe.getsockname()[1]
+
+async def waitForServer(host: str, port: int, timeout: float) -> None:
+    deadline: float = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+async def main(args: argparse.Namespace) -> None:
+    host: str = args.host
+    port: int = args.port or freePort()
+    server: subprocess.Popen | None = None
+    if not args.port:
+        # No server given, so one is started for the run
+        command: list[str] = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py"), "--host", host, "--port", str(port), "--workers", str(args.workers)]
+        server = subprocess.Popen(command, stdout = subprocess.DEVNULL)
+    connections: list[tuple[asyncio.StreamReader, asyncio.StreamWriter, list[Player]]] = []
+    try:
+        await waitForServer(host, port, 30.0)
+        shares: list[int] = [args.sessions // args.connections + (i < args.sessions % args.connections) for i in range(args.connections)]
+        rngs: list[random.Random] = [random.Random(args.seed + i) for i in range(args.connections)]
+        started: float = time.perf_counter()
+        connections = await asyncio.gather(*(openConnection(host, port, share, args, rng) for share, rng in zip(shares, rngs) if share > 0))
+        setup: float = time.perf_counter() - started
+        latencies: list[float] = []
+        started = time.perf_counter()
+        await asyncio.gather(*(play(reader, writer, players, args.mistakes, rng, latencies) for (reader, writer, players), rng in zip(connections, rngs)))
+        elapsed: float = time.perf_counter() - started
+    finally:
+        for _, writer, _ in connections:
+            writer.close()
+        if server != None:
+            server.terminate()
+            server.wait()
+    players: list[Player] = [player for _, _, connectionPlayers in connections for player in connectionPlayers]
+    print(f"{len(players)} sessions of {args.size}x{args.size} at {args.fill:.0%} over {len(connections)} connections, set up in {setup:.2f}s")
+    print(f"{sum(player.won for player in players)} won, {sum(not player.won for player in players)} lost")
+    if latencies:
+        print(f"{len(latencies)} moves in {elapsed:.2f}s, {len(latencies) / elapsed:.0f} moves/s")
+        print(f"move latency p50 {percentile(latencies, 0.5) * 1e3:.2f}ms, p99 {percentile(latencies, 0.99) * 1e3:.2f}ms, max {max(latencies) * 1e3:.2f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Play many sessions against the session server and report move throughput and latency")
+    parser.add_argument('--host', default = SERVER_HOST)
+    parser.add_argument('--port', default = 0, type = int, help = "server to test, a new one is started if not given")
+    parser.add_argument('--sessions', default = 2000, type = int)
+    parser.add_argument('--connections', default = 50, type = int)
+    parser.add_argument('--size', default = 15, type = int)
+    parser.add_argument('--fill', default = 0.6, type = float)
+    parser.add_argument('--mistakes', default = 0.01, type = float, help = "chance of each move being wrong")
+    parser.add_argument('--workers', default = 4, type = int, help = "pool workers for a started server")
+    parser.add_argument('--seed', default = 0, type = int)
+    asyncio.run(main(parser.parse_args()))
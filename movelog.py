@@ -0,0 +1,357 @@
+import argparse
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import deque
+from itertools import compress, count, repeat
+from operator import add, mul, ne
+from typing import BinaryIO, Iterator
+from session import Session, MAX_MISTAKES
+from solvecache import SolveCache
+
+# File layout, all little endian:
+#   header  magic, version
+#   then each game in the order they were played, as fixed width records (tick, i, j, action):
+#     GAME        i and j are the board's width and height, followed by the puzzle's fingerprint
+#                 and its solution packed one bit per tile, column by column
+#     MINE, FLAG  the player's move on tile i, j during that tick of the game
+#     END         i and j are the health and progress the game ended with
+# A game that never got its END, say because the game crashed, is still read and replayed.
+MAGIC: bytes = b"PCRL"
+VERSION: int = 1
+HEADER = struct.Struct("<4sH")
+RECORD = struct.Struct("<IHHb")
+FINGERPRINT_SIZE: int = 16
+# Records are kept in memory until there's this much to write
+LOG_BUFFER_SIZE: int = 1 << 16
+# Reading looks for the end of a game's moves this many records at a time
+MOVE_SCAN_RECORDS: int = 1 << 12
+# Mine and flag match the tile states they ask for
+ACTIONS = {
+    "GAME" : 0,
+    "MINE" : 1,
+    "FLAG" : -1,
+    "END" : 2
+}
+# Tiles written out as bits to the action that's right for them, as signed bytes
+SOLUTION_ACTIONS: bytes = bytes.maketrans(b"01", bytes([ACTIONS["FLAG"] & 0xFF, ACTIONS["MINE"]]))
+# Known tiles to bits
+KNOWN_DIGITS: bytes = bytes.maketrans(b"\x00\x01", b"01")
+
+Move = tuple[int, int, int, int]
+
+class LoggedGame():
+
+    def __init__(self, width: int, height: int, fingerprint: bytes, colFilled: list[int]):
+        self.width: int = width
+        self.height: int = height
+        self.fingerprint: bytes = fingerprint
+        self.colFilled: list[int] = colFilled
+        # The game's move records as they were written
+        self.records: bytearray = bytearray()
+        self.end: Move | None = None
+
+    def moveCount(self) -> int:
+        return len(self.records) // RECORD.size
+
+    def moves(self) -> list[Move]:
+        return list(RECORD.iter_unpack(self.records))
+
+    def fields(self) -> tuple[tuple[int, ...], tuple[int, ...], tuple[int, ...], tuple[int, ...]]:
+        # The ticks, i, j and actions of all the moves, unpacked together
+        values: tuple[int, ...] = struct.unpack(RECORD.format[0] + RECORD.format[1:] * self.moveCount(), self.records)
+        return values[0::4], values[1::4], values[2::4], values[3::4]
+
+    def lines(self) -> tuple[list[str], list[str]]:
+        # Every row and column as a string of its tiles, "1" for mined
+        cols: list[str] = [format(filled, f"0{self.height}b")[::-1] for filled in self.colFilled]
+        tiles: str = "".join(cols)
+        return [tiles[y::self.height] for y in range(self.height)], cols
+
+    @staticmethod
+    def runs(line: str) -> list[int]:
+        return [len(run) for run in line.split("0") if run] or [0]
+
+class KnownTiles():
+    # The tiles known so far in a replayed game. Moves set them in known, flat column by column as
+    # in Session, and settle works out the tiles the session would have flagged by itself from
+    # masks of each row and column, which are read off known again each time.
+
+    def __init__(self, rows: list[str], cols: list[str]):
+        self.width: int = len(cols)
+        self.height: int = len(rows)
+        self.known: bytearray = bytearray(self.width * self.height)
+        self.rowMines: list[int] = [int(row[::-1], 2) for row in rows]
+        self.colMines: list[int] = [int(col[::-1], 2) for col in cols]
+        # Unknown to begin with, so every line is looked at the first time
+        self.rowKnown: list[int] = [-1] * self.height
+        self.colKnown: list[int] = [-1] * self.width
+
+    def settle(self) -> None:
+        # Only lines that changed since last time are looked at, and lines are looked at again
+        # whenever one of their tiles is flagged
+        width, height = self.width, self.height
+        known, rowKnown, colKnown = self.known, self.rowKnown, self.colKnown
+        if 0 not in known:
+            return
+        waiting: deque[tuple[bool, int]] = deque()
+        for y in range(height):
+            mask: int = int(known[y::height].translate(KNOWN_DIGITS)[::-1], 2)
+            if mask != rowKnown[y]:
+                rowKnown[y] = mask
+                waiting.append((True, y))
+        for x in range(width):
+            mask: int = int(known[x * height:(x + 1) * height].translate(KNOWN_DIGITS)[::-1], 2)
+            if mask != colKnown[x]:
+                colKnown[x] = mask
+                waiting.append((False, x))
+        queued: set[tuple[bool, int]] = set(waiting)
+        while waiting:
+            line: tuple[bool, int] = waiting.popleft()
+            queued.discard(line)
+            isRow, lineIndex = line
+            flagged: int = KnownTiles.settledFlags(rowKnown[lineIndex], self.rowMines[lineIndex], width) if isRow else KnownTiles.settledFlags(colKnown[lineIndex], self.colMines[lineIndex], height)
+            while flagged:
+                bit: int = flagged & -flagged
+                flagged ^= bit
+                k: int = bit.bit_length() - 1
+                x, y = (k, lineIndex) if isRow else (lineIndex, k)
+                known[x * height + y] = 1
+                colKnown[x] |= 1 << y
+                rowKnown[y] |= 1 << x
+                for other in ((True, y), (False, x)):
+                    if other not in queued:
+                        queued.add(other)
+                        waiting.append(other)
+
+    @staticmethod
+    def settledFlags(known: int, mines: int, length: int) -> int:
+        # The tiles of a line the session flags by itself: the rest of the line once its mines are
+        # all known, and the tile after a run that's known all the way from either end
+        full: int = (1 << length) - 1
+        if known & mines == mines:
+            return full & ~known
+        flagged: int = 0
+        front: int = ~known & (known + 1)
+        if front > 1 and mines & front >> 1 and not mines & front:
+            flagged |= front
+        back: int = 1 << (full & ~known).bit_length() - 1
+        if back << 1 & full and mines & back << 1 and not mines & back:
+            flagged |= back
+        return flagged
+
+class MoveLog():
+    # Appends games to a log as they're played. Records are gathered in memory and written once
+    # enough have built up or a game ends, so a move never waits on the disk.
+
+    def __init__(self, path: str, bufferSize: int = LOG_BUFFER_SIZE):
+        self.path: str = path
+        self.bufferSize: int = bufferSize
+        self.buffer: bytearray = bytearray()
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as file:
+                MoveLog.readHeader(path, file.read(HEADER.size))
+        else:
+            self.buffer += HEADER.pack(MAGIC, VERSION)
+        self.file: BinaryIO | None = open(path, "ab")
+
+    def close(self) -> None:
+        if self.file != None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def __enter__(self) -> "MoveLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def flush(self) -> None:
+        assert self.file != None
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer.clear()
+
+    def record(self, tick: int, i: int, j: int, action: int) -> None:
+        self.buffer += RECORD.pack(tick, i, j, action)
+        if len(self.buffer) >= self.bufferSize:
+            self.flush()
+
+    def startGame(self, session: Session) -> None:
+        width, height = session.width, session.height
+        solution: int = 0
+        for index in range(width * height):
+            solution |= session.mineable[index] << index
+        self.buffer += RECORD.pack(0, width, height, ACTIONS["GAME"])
+        self.buffer += SolveCache.fingerprint(session.rowNums, session.colNums)[0]
+        self.buffer += solution.to_bytes((width * height + 7) // 8, "little")
+
+    def endGame(self, tick: int, session: Session) -> None:
+        # Finished games are written straight away, this is between games
+        self.buffer += RECORD.pack(tick, session.health, session.progress, ACTIONS["END"])
+        self.flush()
+
+    @staticmethod
+    def readHeader(path: str, data: bytes) -> None:
+        if len(data) < HEADER.size or HEADER.unpack_from(data, 0) != (MAGIC, VERSION):
+            raise Exception(f"{path} is not a move log")
+
+    @staticmethod
+    def read(path: str) -> Iterator[LoggedGame]:
+        with open(path, "rb") as file:
+            data: bytes = file.read()
+        MoveLog.readHeader(path, data)
+        unpack = RECORD.unpack_from
+        size: int = RECORD.size
+        offset: int = HEADER.size
+        game: LoggedGame | None = None
+        while offset + size <= len(data):
+            move: Move = unpack(data, offset)
+            offset += size
+            action: int = move[3]
+            if action == ACTIONS["GAME"]:
+                if game != None:
+                    yield game
+                width, height = move[1], move[2]
+                solutionSize: int = (width * height + 7) // 8
+                if offset + FINGERPRINT_SIZE + solutionSize > len(data):
+                    raise Exception(f"{path} ends partway through a game")
+                fingerprint: bytes = data[offset:offset + FINGERPRINT_SIZE]
+                solution: int = int.from_bytes(data[offset + FINGERPRINT_SIZE:offset + FINGERPRINT_SIZE + solutionSize], "little")
+                offset += FINGERPRINT_SIZE + solutionSize
+                column: int = (1 << height) - 1
+                game = LoggedGame(width, height, fingerprint, [solution >> (x * height) & column for x in range(width)])
+            elif game == None:
+                raise Exception(f"{path} has moves before its first game")
+            elif action == ACTIONS["END"]:
+                game.end = move
+                yield game
+                game = None
+            else:
+                # The rest of the game's moves are taken together
+                offset -= size
+                count: int = MoveLog.countMoves(data, offset)
+                game.records += data[offset:offset + count * size]
+                offset += count * size
+        if game != None:
+            yield game
+
+    @staticmethod
+    def countMoves(data: bytes, offset: int) -> int:
+        # How many records from offset on are moves, up to the next GAME or END record or the end
+        # of the data. Only the action bytes are looked at, a block of records at a time.
+        size: int = RECORD.size
+        total: int = (len(data) - offset) // size
+        count: int = 0
+        while count < total:
+            block: int = min(total, count + MOVE_SCAN_RECORDS)
+            actions: bytes = data[offset + count * size + size - 1:offset + block * size:size]
+            found: list[int] = [index for index in (actions.find(ACTIONS["GAME"]), actions.find(ACTIONS["END"])) if index != -1]
+            if found:
+                return count + min(found)
+            count = block
+        return count
+
+    @staticmethod
+    def replay(game: LoggedGame, checkFingerprint: bool = True) -> tuple[int, int, list[str]]:
+        # Plays the game's moves again under the session's rules, returning the health and progress
+        # it ends with and everything found wrong with the record. A known tile always shows its
+        # solution, so every move leaves its tile known and only the tiles the session flags by
+        # itself take working out, see KnownTiles.
+        problems: list[str] = []
+        width, height = game.width, game.height
+        rows, cols = game.lines()
+        if checkFingerprint and SolveCache.fingerprint([LoggedGame.runs(row) for row in rows], [LoggedGame.runs(col) for col in cols])[0] != game.fingerprint:
+            problems.append("fingerprint doesn't match the solution")
+        mineAction, flagAction = ACTIONS["MINE"], ACTIONS["FLAG"]
+        # The right action for each tile, column by column as in Session
+        solution: array = array("b", "".join(cols).encode().translate(SOLUTION_ACTIONS))
+        ticks, xs, ys, actions = game.fields()
+        lastTick: int = ticks[-1] if ticks else 0
+        if not (list(ticks) == sorted(ticks) and max(xs, default = 0) < width and max(ys, default = 0) < height and set(actions) <= {mineAction, flagAction}):
+            ticks, xs, ys, actions = MoveLog.checkMoves(game, problems)
+        tiles = KnownTiles(rows, cols)
+        health: int = MoveLog.playMoves(tiles, solution, list(map(add, map(mul, xs, repeat(height)), ys)), actions)
+        tiles.settle()
+        known: bytearray = tiles.known
+        if game.end != None:
+            tick, endHealth, endProgress, _ = game.end
+            progress: int = known.count(1)
+            if tick < lastTick:
+                problems.append(f"game ends at tick {tick} after a move at tick {lastTick}")
+            if (endHealth, endProgress) != (health, progress):
+                problems.append(f"game ended with health {endHealth} and progress {endProgress}, replayed to {health} and {progress}")
+        return health, known.count(1), problems
+
+    @staticmethod
+    def checkMoves(game: LoggedGame, problems: list[str]) -> tuple[tuple[int, ...], ...]:
+        # Goes through a record one move at a time to say what's wrong with it, returning the
+        # fields of the moves that can still be played
+        moves: list[Move] = []
+        lastTick: int = 0
+        for move in game.moves():
+            tick, i, j, action = move
+            if tick < lastTick:
+                problems.append(f"tick {tick} comes after tick {lastTick}")
+            lastTick = tick
+            if i >= game.width or j >= game.height:
+                problems.append(f"tick {tick}: tile {i}, {j} is off the board")
+            elif action != ACTIONS["MINE"] and action != ACTIONS["FLAG"]:
+                problems.append(f"tick {tick}: unknown action {action}")
+            else:
+                moves.append(move)
+        return tuple(zip(*moves)) if moves else ((), (), (), ())
+
+    @staticmethod
+    def playMoves(tiles: KnownTiles, solution: array, indices: list[int], actions: tuple[int, ...]) -> int:
+        # Plays moves on the board with actions that exist, returning the health left. Every move
+        # leaves its tile known, so the moves up to each wrong one are laid down together. Only a
+        # wrong move on a tile no move has been on needs the session's own flags worked out, in
+        # case they got there first.
+        known: bytearray = tiles.known
+        health: int = MAX_MISTAKES
+        played: int = 0
+        for position in compress(count(), map(ne, map(solution.__getitem__, indices), actions)):
+            for index in indices[played:position]:
+                known[index] = 1
+            played = position
+            index: int = indices[position]
+            if known[index]:
+                continue
+            tiles.settle()
+            if known[index]:
+                continue
+            health -= 1
+            known[index] = 1
+            if health == 0:
+                # The game is lost and takes no more moves
+                return health
+        for index in indices[played:]:
+            known[index] = 1
+        return health
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Replay recorded games without a window and check they end the way they were recorded")
+    parser.add_argument('paths', nargs = '+', metavar = 'PATH')
+    parser.add_argument('--no-fingerprints', action = 'store_true', help = "don't check the recorded fingerprints, which is most of the work besides the moves")
+    args = parser.parse_args()
+    games: int = 0
+    moves: int = 0
+    failed: int = 0
+    started: float = time.perf_counter()
+    for path in args.paths:
+        for index, game in enumerate(MoveLog.read(path)):
+            _, _, problems = MoveLog.replay(game, not args.no_fingerprints)
+            games += 1
+            moves += game.moveCount()
+            if problems:
+                failed += 1
+                print(f"{path} game {index} ({game.width}x{game.height}):")
+                for problem in problems:
+                    print(f"    {problem}")
+    elapsed: float = time.perf_counter() - started
+    print(f"{games} games, {moves} moves replayed in {elapsed:.2f}s, {moves / max(elapsed, 1e-9):.0f} moves/s, {failed} with problems")
+    sys.exit(1 if failed else 0)
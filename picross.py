@@ -1,4 +1,46 @@
-from gameobjects import *
+import argparse
+from contextlib import nullcontext
+from engine import Engine, PUZZLE_BANK_PATH, SOLVE_CACHE_PATH
+from solvecache import SolveCache
+from movelog import MoveLog
 
-game = Game()
-game.mainloop()
\ No newline at end of file
+parser = argparse.ArgumentParser()
+parser.add_argument('width', default = 15, type = int, nargs = '?')
+parser.add_argument('height', default = 15, type = int, nargs = '?')
+parser.add_argument('difficulty', default = 0.6, type = float, nargs = '?')
+parser.add_argument('--workers', default = 1, type = int)
+parser.add_argument('--bank', default = PUZZLE_BANK_PATH)
+parser.add_argument('--fill-bank', default = 0, type = int, metavar = 'COUNT')
+parser.add_argument('--stats', default = None, metavar = 'PATH')
+parser.add_argument('--cache', default = SOLVE_CACHE_PATH, metavar = 'PATH', help = "file of earlier solve results")
+parser.add_argument('--no-cache', action = 'store_true')
+parser.add_argument('--log', default = None, metavar = 'PATH', help = "file to record the games played in")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    cachePath: str | None = None if args.no_cache else args.cache
+    with SolveCache(cachePath) if cachePath != None else nullcontext() as cache, Engine.cachingSolves(cache):
+        if args.fill_bank > 0:
+            Engine.fillBank(args.width, args.height, args.difficulty, args.fill_bank, args.workers, args.bank)
+            print(f"Added {args.fill_bank} puzzles of size {args.width}x{args.height} to {args.bank}")
+        else:
+            # The gasp front end is only imported once a game is actually started
+            from gasp import games # type: ignore
+            from gameobjects import Game
+            from prefetch import Prefetcher, Settings
+            prefetcher = Prefetcher(args.bank, cachePath = cachePath)
+            moveLog: MoveLog | None = None if args.log == None else MoveLog(args.log)
+            settings: Settings | None = (args.width, args.height, args.difficulty)
+            try:
+                while settings != None:
+                    game = Game(*settings, args.workers, args.bank, args.stats, prefetcher, moveLog)
+                    game.mainloop()
+                    if moveLog != None:
+                        moveLog.endGame(game.ticks, game.session)
+                    settings = game.nextGame
+                    # gasp only allows one screen at a time, and the next game opens its own
+                    games.Screen.initialised = 0
+            finally:
+                prefetcher.cancel()
+                if moveLog != None:
+                    moveLog.close()
@@ -0,0 +1,93 @@
+import multiprocessing
+import queue
+from contextlib import nullcontext
+from engine import Engine, PUZZLE_BANK_PATH
+from solvecache import SolveCache
+
+# Boards kept ready ahead of the player
+PREFETCH_DEPTH: int = 1
+
+Settings = tuple[int, int, float]
+
+class Prefetcher():
+    # Prepares boards for upcoming games in a background process, so starting a game doesn't
+    # wait on the generator, and nothing here ever blocks the game loop. Boards are drawn from
+    # the bank when it has them and generated otherwise, through the solve cache at cachePath if
+    # there is one.
+
+    def __init__(self, bankPath: str = PUZZLE_BANK_PATH, depth: int = PREFETCH_DEPTH, cachePath: str | None = None):
+        self.bankPath: str = bankPath
+        self.cachePath: str | None = cachePath
+        self.depth: int = depth
+        self.settings: Settings | None = None
+        self.ready: list[list[list[int]]] = []
+        # Boards the current process has still to deliver
+        self.pending: int = 0
+        self.process: multiprocessing.Process | None = None
+        self.results: multiprocessing.Queue | None = None
+
+    def request(self, width: int, height: int, fillPercent: float) -> None:
+        # Makes sure boards with these settings are being prepared. Boards and work for any other
+        # settings are thrown away.
+        settings: Settings = (width, height, fillPercent)
+        if settings != self.settings:
+            self.cancel()
+            self.settings = settings
+        self.poll()
+        if self.pending == 0 and len(self.ready) < self.depth:
+            self.pending = self.depth - len(self.ready)
+            self.results = multiprocessing.Queue()
+            self.process = multiprocessing.Process(target = Prefetcher.work, args = (self.results, width, height, fillPercent, self.pending, self.bankPath, self.cachePath), daemon = True)
+            self.process.start()
+
+    def poll(self) -> None:
+        # Collects finished boards without waiting for any. A process that died before delivering
+        # them all, say because it crashed or was killed, is forgotten, so they can be asked for again.
+        exited: bool = self.process != None and not self.process.is_alive()
+        while self.pending > 0:
+            try:
+                self.ready.append(self.results.get_nowait())
+            except queue.Empty:
+                break
+            self.pending -= 1
+        if exited and self.pending > 0:
+            self.process = None
+            self.results = None
+            self.pending = 0
+
+    def hasBoard(self, width: int, height: int, fillPercent: float) -> bool:
+        self.poll()
+        return self.settings == (width, height, fillPercent) and len(self.ready) > 0
+
+    def isPreparing(self, width: int, height: int, fillPercent: float) -> bool:
+        # Whether a board with these settings is still on its way. Not once the process preparing
+        # it has died, so nobody waits on it forever.
+        self.poll()
+        return self.settings == (width, height, fillPercent) and self.pending > 0
+
+    def take(self, width: int, height: int, fillPercent: float) -> list[list[int]] | None:
+        # A prepared board with these settings, or None if there isn't one yet
+        if not self.hasBoard(width, height, fillPercent):
+            return None
+        return self.ready.pop(0)
+
+    def cancel(self) -> None:
+        # Stops the background process straight away. Its queue goes with it, since a process
+        # terminated halfway through sending can leave the queue unusable.
+        if self.process != None:
+            self.process.terminate()
+            self.process.join()
+        self.process = None
+        self.results = None
+        self.pending = 0
+        self.settings = None
+        self.ready.clear()
+
+    @staticmethod
+    def work(results: multiprocessing.Queue, width: int, height: int, fillPercent: float, count: int, bankPath: str, cachePath: str | None) -> None:
+        with SolveCache(cachePath) if cachePath != None else nullcontext() as cache, Engine.cachingSolves(cache):
+            for _ in range(count):
+                board: list[list[int]] | None = Engine.drawFromBank(width, height, fillPercent, bankPath)
+                if board == None:
+                    board = Engine.generateBoard(width, height, fillPercent)
+                results.put(board)
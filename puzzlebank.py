@@ -0,0 +1,136 @@
+import mmap
+import os
+import random
+import struct
+import sys
+from array import array
+
+# File layout, all little endian:
+#   header   magic, version, section count
+#   sections (width, height, density bucket, puzzle count, offset of the section's record table)
+#   per section, a table of count + 1 record offsets followed by the records themselves
+#   record   the solution packed one bit per tile, column by column, then for every row and
+#            then every column a u16 clue count followed by the u16 clues
+MAGIC: bytes = b"PCRB"
+VERSION: int = 1
+HEADER = struct.Struct("<4sHI")
+SECTION = struct.Struct("<HHHIQ")
+OFFSET = struct.Struct("<Q")
+DENSITY_BUCKETS: int = 20
+
+class PuzzleBank():
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.sections: dict[tuple[int, int, int], tuple[int, int]] = {}
+        self.data: mmap.mmap | None = None
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, version, sectionCount = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise Exception(f"{path} is not a puzzle bank")
+        for i in range(sectionCount):
+            width, height, bucket, count, offset = SECTION.unpack_from(self.data, HEADER.size + i * SECTION.size)
+            self.sections[(width, height, bucket)] = (count, offset)
+
+    def close(self) -> None:
+        if self.data != None:
+            self.data.close()
+            self.data = None
+
+    def __enter__(self) -> "PuzzleBank":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @staticmethod
+    def bucket(fillPercent: float) -> int:
+        return round(fillPercent * DENSITY_BUCKETS)
+
+    def count(self, width: int, height: int, bucket: int) -> int:
+        return self.sections.get((width, height, bucket), (0, 0))[0]
+
+    def rawRecord(self, key: tuple[int, int, int], index: int) -> bytes:
+        assert self.data != None
+        count, table = self.sections[key]
+        if not 0 <= index < count:
+            raise IndexError(index)
+        start, = OFFSET.unpack_from(self.data, table + index * OFFSET.size)
+        end, = OFFSET.unpack_from(self.data, table + (index + 1) * OFFSET.size)
+        return self.data[start:end]
+
+    def read(self, width: int, height: int, bucket: int, index: int) -> tuple[list[int], list[list[int]], list[list[int]]]:
+        return PuzzleBank.decode(width, height, self.rawRecord((width, height, bucket), index))
+
+    def draw(self, width: int, height: int, fillPercent: float, rng: random.Random | None = None) -> tuple[list[int], list[list[int]], list[list[int]]] | None:
+        bucket: int = PuzzleBank.bucket(fillPercent)
+        count: int = self.count(width, height, bucket)
+        if count == 0:
+            return None
+        index: int = (random if rng == None else rng).randrange(count)
+        return self.read(width, height, bucket, index)
+
+    @staticmethod
+    def encode(width: int, height: int, colFilled: list[int], rowNums: list[list[int]], colNums: list[list[int]]) -> bytes:
+        solution: int = 0
+        for x in range(width):
+            solution |= colFilled[x] << (x * height)
+        clues = array("H")
+        for nums in rowNums + colNums:
+            clues.append(len(nums))
+            clues.extend(nums)
+        if sys.byteorder == "big":
+            clues.byteswap()
+        return solution.to_bytes((width * height + 7) // 8, "little") + clues.tobytes()
+
+    @staticmethod
+    def decode(width: int, height: int, record: bytes) -> tuple[list[int], list[list[int]], list[list[int]]]:
+        solutionSize: int = (width * height + 7) // 8
+        solution: int = int.from_bytes(record[:solutionSize], "little")
+        column: int = (1 << height) - 1
+        colFilled: list[int] = [solution >> (x * height) & column for x in range(width)]
+        clues = array("H")
+        clues.frombytes(record[solutionSize:])
+        if sys.byteorder == "big":
+            clues.byteswap()
+        lines: list[list[int]] = []
+        i: int = 0
+        for _ in range(height + width):
+            n: int = clues[i]
+            lines.append(clues[i + 1:i + 1 + n].tolist())
+            i += 1 + n
+        return colFilled, lines[:height], lines[height:]
+
+    @staticmethod
+    def append(path: str, key: tuple[int, int, int], records: list[bytes]) -> None:
+        # Rewrites the bank with records added to the section for key, replacing the file atomically
+        merged: dict[tuple[int, int, int], list[bytes]] = {}
+        with PuzzleBank(path) as bank:
+            for oldKey, (count, _) in bank.sections.items():
+                merged[oldKey] = [bank.rawRecord(oldKey, i) for i in range(count)]
+        merged.setdefault(key, []).extend(records)
+
+        keys: list[tuple[int, int, int]] = sorted(merged)
+        offset: int = HEADER.size + len(keys) * SECTION.size
+        header: bytearray = bytearray(HEADER.pack(MAGIC, VERSION, len(keys)))
+        body: bytearray = bytearray()
+        for sectionKey in keys:
+            sectionRecords: list[bytes] = merged[sectionKey]
+            header += SECTION.pack(*sectionKey, len(sectionRecords), offset)
+            recordStart: int = offset + (len(sectionRecords) + 1) * OFFSET.size
+            for record in sectionRecords:
+                body += OFFSET.pack(recordStart)
+                recordStart += len(record)
+            body += OFFSET.pack(recordStart)
+            for record in sectionRecords:
+                body += record
+            offset = recordStart
+
+        temp: str = path + ".tmp"
+        with open(temp, "wb") as file:
+            file.write(header)
+            file.write(body)
+        os.replace(temp, path)
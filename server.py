@@ -0,0 +1,165 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from engine import Engine, PUZZLE_BANK_PATH
+from session import Session
+
+SERVER_HOST: str = "127.0.0.1"
+SERVER_PORT: int = 8765
+MAX_SESSION_SIZE: int = 100
+
+# One JSON object per line each way. Every request may carry an "id", which its response echoes.
+#   {"op": "new", "width": 15, "height": 15, "fill": 0.6}
+#       -> {"session": 0, "width": 15, "height": 15, "rows": [...], "cols": [...], ...state}
+#   {"op": "mine" or "flag", "session": 0, "x": 3, "y": 4}  -> {...state}
+#   {"op": "close", "session": 0}                           -> {"closed": true}
+# where state is "events" (see session.EVENTS), "health", "progress", "lost" and "won". A request
+# that can't be served gets {"error": "..."} instead.
+
+class SessionServer():
+    # Hosts many headless games on one event loop. Moves are cheap and applied straight away;
+    # boards are drawn or generated in a process pool so the loop never waits on the solver.
+    # Sessions belong to the connection that made them and go with it.
+
+    def __init__(self, workers: int = 1, bankPath: str = PUZZLE_BANK_PATH):
+        self.bankPath: str = bankPath
+        # Forked workers would hold on to every connection open at the time, so they're spawned
+        self.pool = ProcessPoolExecutor(max_workers = workers, mp_context = multiprocessing.get_context("spawn"))
+        self.sessions: dict[int, Session] = {}
+        self.nextSession: int = 0
+        # The task serving each open connection, and the connection
+        self.connections: dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def serve(self, host: str = SERVER_HOST, port: int = SERVER_PORT) -> None:
+        # Runs until cancelled or terminated, and takes the pool workers down with it either way
+        stopping = asyncio.Event()
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+        except NotImplementedError:
+            pass
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving on {host}:{server.sockets[0].getsockname()[1]}", flush = True)
+        try:
+            async with server:
+                await stopping.wait()
+                # Connections are closed rather than their tasks cancelled, so every one finishes as usual
+                for writer in self.connections.values():
+                    writer.close()
+                if self.connections:
+                    await asyncio.wait(self.connections)
+        finally:
+            self.pool.shutdown(cancel_futures = True)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        owned: set[int] = set()
+        tasks: set[asyncio.Task] = set()
+        handler: asyncio.Task | None = asyncio.current_task()
+        assert handler != None
+        self.connections[handler] = writer
+        try:
+            while line := await reader.readline():
+                try:
+                    request: dict = json.loads(line)
+                except ValueError as error:
+                    self.send(writer, {"error": f"Bad request: {error}"})
+                    continue
+                if request.get("op") == "new":
+                    # Other requests on this connection carry on while the board is prepared
+                    task = asyncio.create_task(self.create(request, owned, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                else:
+                    self.send(writer, self.respond(request, owned))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            for sessionId in owned:
+                self.sessions.pop(sessionId, None)
+            del self.connections[handler]
+            writer.close()
+
+    def send(self, writer: asyncio.StreamWriter, response: dict) -> None:
+        writer.write(json.dumps(response).encode() + b"\n")
+
+    async def create(self, request: dict, owned: set[int], writer: asyncio.StreamWriter) -> None:
+        response: dict
+        try:
+            width, height, fillPercent = int(request["width"]), int(request["height"]), float(request["fill"])
+            if not (0 < width <= MAX_SESSION_SIZE and 0 < height <= MAX_SESSION_SIZE and 0.0 < fillPercent < 1.0):
+                raise ValueError("Board size or fill out of range")
+            board: list[list[int]] = await asyncio.get_running_loop().run_in_executor(self.pool, SessionServer.prepareBoard, width, height, fillPercent, self.bankPath)
+            session = Session(board)
+            sessionId: int = self.nextSession
+            self.nextSession += 1
+            self.sessions[sessionId] = session
+            owned.add(sessionId)
+            response = {"session": sessionId, "width": width, "height": height, "rows": session.rowNums, "cols": session.colNums, **SessionServer.state(session)}
+        except Exception as error:
+            response = {"error": f"{type(error).__name__}: {error}"}
+        if "id" in request:
+            response["id"] = request["id"]
+        self.send(writer, response)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    def respond(self, request: dict, owned: set[int]) -> dict:
+        response: dict
+        try:
+            op = request.get("op")
+            sessionId: int = int(request["session"])
+            if sessionId not in owned:
+                raise KeyError(f"No session {sessionId} on this connection")
+            session: Session = self.sessions[sessionId]
+            if op == "mine" or op == "flag":
+                x, y = int(request["x"]), int(request["y"])
+                if not (0 <= x < session.width and 0 <= y < session.height):
+                    raise ValueError("Tile out of range")
+                if op == "mine":
+                    session.mine(x, y)
+                else:
+                    session.flag(x, y)
+                response = SessionServer.state(session)
+            elif op == "close":
+                owned.discard(sessionId)
+                del self.sessions[sessionId]
+                response = {"closed": True}
+            else:
+                raise ValueError(f"Unknown op {op}")
+        except Exception as error:
+            response = {"error": f"{type(error).__name__}: {error}"}
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    @staticmethod
+    def state(session: Session) -> dict:
+        return {"events": session.takeEvents(), "health": session.health, "progress": session.progress, "lost": session.locked, "won": session.isWon()}
+
+    @staticmethod
+    def prepareBoard(width: int, height: int, fillPercent: float, bankPath: str) -> list[list[int]]:
+        # Runs in a pool worker
+        board: list[list[int]] | None = Engine.drawFromBank(width, height, fillPercent, bankPath)
+        if board == None:
+            board = Engine.generateBoard(width, height, fillPercent)
+        return board
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Host headless picross games over TCP, one JSON message per line")
+    parser.add_argument('--host', default = SERVER_HOST)
+    parser.add_argument('--port', default = SERVER_PORT, type = int)
+    parser.add_argument('--workers', default = os.cpu_count() or 1, type = int)
+    parser.add_argument('--bank', default = PUZZLE_BANK_PATH)
+    args = parser.parse_args()
+    try:
+        asyncio.run(SessionServer(args.workers, args.bank).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
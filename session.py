@@ -0,0 +1,211 @@
+from array import array
+from collections import deque
+from engine import Engine, STATES
+
+MAX_MISTAKES: int = 3
+# What a move changed, in the order it happened:
+#   (TILE, x, y, state)        a tile became known, by a move or by being flagged automatically
+#   (MISTAKE, x, y)            the tile was a wrong move and shows its real state instead
+#   (CROSSOUT, isRow, line, k) clue k of that row or column is done
+EVENTS = {
+    "TILE" : 0,
+    "MISTAKE" : 1,
+    "CROSSOUT" : 2
+}
+
+Event = tuple[int, int, int, int] | tuple[int, int, int] | tuple[int, bool, int, int]
+
+class LineProgress():
+    # Cross-out state of one row or column, updated one tile at a time. Known tiles only ever
+    # grow in from either end of the line, so each end keeps a cursor past the known tiles with
+    # its current run and the next clue to cross out, and every tile is passed at most once.
+    # The line is the range of its tile indices into the session's arrays.
+
+    def __init__(self, session: "Session", line: range, nums: list[int], isRow: bool, lineIndex: int):
+        self.states: array = session.states
+        self.events: list[Event] = session.events
+        self.line: range = line
+        self.nums: list[int] = nums
+        self.isRow: bool = isRow
+        self.lineIndex: int = lineIndex
+        self.remaining: int = sum(session.mineable[index] for index in line)
+        self.front: int = 0
+        self.frontRun: int = 0
+        self.frontNumber: int = 0
+        self.back: int = len(line) - 1
+        self.backRun: int = 0
+        self.backNumber: int = len(nums) - 1
+        self.finished: bool = False
+
+    def update(self, index: int, toFlag: deque[int]) -> None:
+        # Takes the index of a tile of this line that just became known, adding the indices of the
+        # tiles that must be flagged to toFlag
+        states: array = self.states
+        line: range = self.line
+        unknown: int = STATES["UNKNOWN"]
+        mined: int = STATES["MINED"]
+        if states[index] == mined:
+            self.remaining -= 1
+
+        # Runs completed from the left
+        front: int = self.front
+        while front < len(line):
+            state: int = states[line[front]]
+            if state == unknown:
+                break
+            if state == mined:
+                self.frontRun += 1
+                if self.frontNumber < len(self.nums) and self.frontRun == self.nums[self.frontNumber]:
+                    self.events.append((EVENTS["CROSSOUT"], self.isRow, self.lineIndex, self.frontNumber))
+                    self.frontNumber += 1
+                    if front + 1 < len(line):
+                        toFlag.append(line[front + 1])
+            else:
+                self.frontRun = 0
+            front += 1
+        self.front = front
+
+        # Runs completed from the right
+        back: int = self.back
+        while back > -1:
+            state: int = states[line[back]]
+            if state == unknown:
+                break
+            if state == mined:
+                self.backRun += 1
+                if self.backNumber > -1 and self.backRun == self.nums[self.backNumber]:
+                    self.events.append((EVENTS["CROSSOUT"], self.isRow, self.lineIndex, self.backNumber))
+                    self.backNumber -= 1
+                    if back - 1 > -1:
+                        toFlag.append(line[back - 1])
+            else:
+                self.backRun = 0
+            back -= 1
+        self.back = back
+
+        # Every mine is found, so the rest of the line is flagged
+        if self.remaining == 0 and not self.finished:
+            self.finished = True
+            toFlag.extend(index for index in line if states[index] == unknown)
+
+
+
+class Session():
+    # The rules of one game without anything drawn: moves, mistakes, health, progress and cross
+    # outs. Tiles live in flat arrays column by column as in the solution, and every move leaves
+    # the events it caused in events until they're taken.
+
+    def __init__(self, solution: list[list[int]]):
+        self.width: int = len(solution)
+        self.height: int = len(solution[0])
+        self.rowNums: list[list[int]] = Engine.getListRowNums(solution)
+        self.colNums: list[list[int]] = Engine.getListColNums(solution)
+        self.states: array = array("b", [STATES["UNKNOWN"]]) * (self.width * self.height)
+        self.mineable: array = array("b", [tile == STATES["MINED"] for col in solution for tile in col])
+        self.tileLocked: array = array("b", [0]) * (self.width * self.height)
+        self.health: int = MAX_MISTAKES
+        self.progress: int = 0
+        # Once the game is lost the whole board is locked
+        self.locked: bool = False
+        self.events: list[Event] = []
+        # Indices of the tiles waiting to be flagged by handleCrossouts, in the order they were
+        # found, and whether it is already flagging them
+        self.pendingFlags: deque[int] = deque()
+        self.flaggingPending: bool = False
+        self.rowProgress: list[LineProgress] = [LineProgress(self, self.getRow(y), self.rowNums[y], True, y) for y in range(self.height)]
+        self.colProgress: list[LineProgress] = [LineProgress(self, self.getCol(x), self.colNums[x], False, x) for x in range(self.width)]
+
+        # Lines without mines are flagged from the start
+        for y in range(self.height):
+            if self.rowNums[y][0] == 0:
+                self.flag(0, y)
+        for x in range(self.width):
+            if self.colNums[x][0] == 0:
+                self.flag(x, 0)
+
+    def tileIndex(self, x: int, y: int) -> int:
+        return x * self.height + y
+
+    def getRow(self, rowIndex: int) -> range:
+        # Indices of the tiles in this row
+        return range(rowIndex, self.width * self.height, self.height)
+
+    def getCol(self, colIndex: int) -> range:
+        return range(colIndex * self.height, (colIndex + 1) * self.height)
+
+    def isWon(self) -> bool:
+        return self.progress == self.width * self.height
+
+    def takeEvents(self) -> list[Event]:
+        # The events since they were last taken. The list itself is kept, the lines append to it.
+        events: list[Event] = self.events[:]
+        self.events.clear()
+        return events
+
+    def handleMistake(self, x: int, y: int) -> None:
+        index: int = self.tileIndex(x, y)
+        self.health -= 1
+        if self.mineable[index]:
+            self.mine(x, y)
+        else:
+            self.flag(x, y)
+        self.events.append((EVENTS["MISTAKE"], x, y))
+        self.tileLocked[index] = 1
+        if self.health == 0:
+            self.locked = True
+        return
+
+    def mine(self, x: int, y: int) -> None:
+        index: int = self.tileIndex(x, y)
+        # Handle unchangeable tiles
+        if self.tileLocked[index] or self.locked:
+            return
+
+        # Handle flagged tiles
+        if self.states[index] == STATES["FLAGGED"]:
+            return
+
+        # Handle mistake
+        if not self.mineable[index]:
+            self.handleMistake(x, y)
+            return
+
+        # Mine this tile
+        self.states[index] = STATES["MINED"]
+        self.tileLocked[index] = 1
+        self.events.append((EVENTS["TILE"], x, y, STATES["MINED"]))
+        self.handleCrossouts(y, x)
+        self.progress += 1
+        return
+
+    def flag(self, x: int, y: int) -> None:
+        index: int = self.tileIndex(x, y)
+        # Handle unchangeable tiles
+        if self.tileLocked[index] or self.locked:
+            return
+
+        # Handle mistake
+        if self.mineable[index]:
+            self.handleMistake(x, y)
+            return
+
+        # Flag this tile
+        self.states[index] = STATES["FLAGGED"]
+        self.tileLocked[index] = 1
+        self.events.append((EVENTS["TILE"], x, y, STATES["FLAGGED"]))
+        self.handleCrossouts(y, x)
+        self.progress += 1
+        return
+
+    def handleCrossouts(self, rowIndex: int, colIndex: int) -> None:
+        # Called whenever the tile at colIndex, rowIndex becomes known. The flags this sets off are
+        # worked through here one at a time, rather than each flag starting a cascade of its own.
+        index: int = self.tileIndex(colIndex, rowIndex)
+        self.rowProgress[rowIndex].update(index, self.pendingFlags)
+        self.colProgress[colIndex].update(index, self.pendingFlags)
+        if self.flaggingPending:
+            return
+        self.flaggingPending = True
+        while self.pendingFlags:
+            self.flag(*divmod(self.pendingFlags.popleft(), self.height))
+        self.flaggingPending = False
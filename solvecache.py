@@ -0,0 +1,145 @@
+import hashlib
+import sqlite3
+from itertools import product
+
+# Puzzles kept in the cache, past this the least recently used ones are evicted
+SOLVE_CACHE_SIZE: int = 1 << 16
+# What the solver makes of a puzzle starting from an empty board
+STATUSES = {
+    "STUCK" : 0,
+    "SOLVED" : 1,
+    "INVALID" : -1
+}
+
+# (transpose, flip left to right, flip top to bottom), the flips are applied first
+Transform = tuple[bool, bool, bool]
+# (status, whether the puzzle has one solution if that's known, mined column masks if solved)
+CachedSolve = tuple[int, bool | None, list[int] | None]
+
+class SolveCache():
+    # Solve results kept in a SQLite file. Puzzles are keyed on a fingerprint of their clues that
+    # is the same for all eight transposed and flipped versions of a puzzle, so solutions are
+    # stored in the orientation the fingerprint picks and turned back on the way out.
+
+    def __init__(self, path: str, size: int = SOLVE_CACHE_SIZE):
+        self.path: str = path
+        self.size: int = size
+        self.connection: sqlite3.Connection | None = sqlite3.connect(path, isolation_level = None)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS solves (fingerprint BLOB PRIMARY KEY, status INTEGER NOT NULL, isUnique INTEGER, solution BLOB, used INTEGER NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS solvesByUse ON solves (used)")
+        self.count: int
+        self.clock: int
+        self.count, self.clock = self.connection.execute("SELECT COUNT(*), COALESCE(MAX(used), 0) FROM solves").fetchone()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def close(self) -> None:
+        if self.connection != None:
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self) -> "SolveCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get(self, rowNums: list[list[int]], colNums: list[list[int]]) -> CachedSolve | None:
+        assert self.connection != None
+        fingerprint, transform = SolveCache.fingerprint(rowNums, colNums)
+        row = self.connection.execute("SELECT status, isUnique, solution FROM solves WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        if row == None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.clock += 1
+        self.connection.execute("UPDATE solves SET used = ? WHERE fingerprint = ?", (self.clock, fingerprint))
+        status, isUnique, solution = row
+        colFilled: list[int] | None = None if solution == None else SolveCache.decodeSolution(solution, len(colNums), len(rowNums), transform)
+        return status, None if isUnique == None else bool(isUnique), colFilled
+
+    def put(self, rowNums: list[list[int]], colNums: list[list[int]], status: int, isUnique: bool | None = None, colFilled: list[int] | None = None) -> None:
+        # Anything left as None keeps what was stored before
+        assert self.connection != None
+        fingerprint, transform = SolveCache.fingerprint(rowNums, colNums)
+        solution: bytes | None = None if colFilled == None else SolveCache.encodeSolution(colFilled, len(rowNums), transform)
+        self.clock += 1
+        known: bool = self.connection.execute("SELECT 1 FROM solves WHERE fingerprint = ?", (fingerprint,)).fetchone() != None
+        self.connection.execute(
+            "INSERT INTO solves VALUES (?, ?, ?, ?, ?) ON CONFLICT (fingerprint) DO UPDATE SET status = excluded.status, "
+            "isUnique = COALESCE(excluded.isUnique, isUnique), solution = COALESCE(excluded.solution, solution), used = excluded.used",
+            (fingerprint, status, None if isUnique == None else int(isUnique), solution, self.clock))
+        if not known:
+            self.count += 1
+            if self.count > self.size:
+                self.evict()
+
+    def evict(self) -> None:
+        # Other processes may share the file, so the entries are counted again before any go
+        assert self.connection != None
+        self.count = self.connection.execute("SELECT COUNT(*) FROM solves").fetchone()[0]
+        if self.count > self.size:
+            self.connection.execute("DELETE FROM solves WHERE fingerprint IN (SELECT fingerprint FROM solves ORDER BY used LIMIT ?)", (self.count - self.size,))
+            self.count = self.size
+
+    @staticmethod
+    def fingerprint(rowNums: list[list[int]], colNums: list[list[int]]) -> tuple[bytes, Transform]:
+        # The orientation with the smallest clue text is the canonical one. Every orientation is
+        # made of the same line texts, so each line is only written out once each way round.
+        rowTexts: tuple[list[str], list[str]] = ([" ".join(map(str, nums)) for nums in rowNums], [" ".join(map(str, nums[::-1])) for nums in rowNums])
+        colTexts: tuple[list[str], list[str]] = ([" ".join(map(str, nums)) for nums in colNums], [" ".join(map(str, nums[::-1])) for nums in colNums])
+        best: str | None = None
+        bestTransform: Transform = (False, False, False)
+        for transform in product((False, True), repeat = 3):
+            transpose, flipX, flipY = transform
+            # Flipping x reverses each row and the order of the columns, flipping y the other way round
+            rows: list[str] = rowTexts[flipX][::-1] if flipY else rowTexts[flipX]
+            cols: list[str] = colTexts[flipY][::-1] if flipX else colTexts[flipY]
+            if transpose:
+                rows, cols = cols, rows
+            text: str = ";".join(rows) + "|" + ";".join(cols)
+            if best == None or text < best:
+                best, bestTransform = text, transform
+        assert best != None
+        return hashlib.blake2b(best.encode(), digest_size = 16).digest(), bestTransform
+
+    @staticmethod
+    def reverseMask(mask: int, length: int) -> int:
+        return int(format(mask, f"0{length}b")[::-1], 2) if length > 0 else 0
+
+    @staticmethod
+    def transposeColumns(colFilled: list[int], height: int) -> list[int]:
+        return [sum((colFilled[x] >> y & 1) << x for x in range(len(colFilled))) for y in range(height)]
+
+    @staticmethod
+    def encodeSolution(colFilled: list[int], height: int, transform: Transform) -> bytes:
+        # The solution turned to the canonical orientation, packed one bit per tile column by column
+        transpose, flipX, flipY = transform
+        if flipX:
+            colFilled = colFilled[::-1]
+        if flipY:
+            colFilled = [SolveCache.reverseMask(mask, height) for mask in colFilled]
+        if transpose:
+            colFilled, height = SolveCache.transposeColumns(colFilled, height), len(colFilled)
+        solution: int = 0
+        for x in range(len(colFilled)):
+            solution |= colFilled[x] << (x * height)
+        return solution.to_bytes((len(colFilled) * height + 7) // 8, "little")
+
+    @staticmethod
+    def decodeSolution(record: bytes, width: int, height: int, transform: Transform) -> list[int]:
+        # Unpacks a solution stored by encodeSolution for a puzzle of this size and orientation
+        transpose, flipX, flipY = transform
+        storedWidth, storedHeight = (height, width) if transpose else (width, height)
+        solution: int = int.from_bytes(record, "little")
+        column: int = (1 << storedHeight) - 1
+        colFilled: list[int] = [solution >> (x * storedHeight) & column for x in range(storedWidth)]
+        if transpose:
+            colFilled = SolveCache.transposeColumns(colFilled, storedHeight)
+        if flipY:
+            colFilled = [SolveCache.reverseMask(mask, height) for mask in colFilled]
+        if flipX:
+            colFilled = colFilled[::-1]
+        return colFilled
@@ -1,4 +1,6 @@
-from gameobjects import Game, STATES
+from engine import Engine, STATES
+from batchsolve import readNon
+import io
 import unittest
 
 TESTBOARD = [
@@ -41,10 +43,27 @@ TESTCOLS = [
     [1]
 ]
 
+class TestReadNon(unittest.TestCase):
 
-board1 = Game.solveBoard(TESTROWS, TESTCOLS, SOLUTION)
-board2 = Game.solveBoard(TESTROWS, TESTCOLS, COUNTERBOARD)
-Game.printBoard(board1)
-print("-----")
-Game.printBoard(board2)
-print(Game.boardIsSolvable(TESTROWS, TESTCOLS, COUNTERBOARD))
\ No newline at end of file
+    def testMalformedPuzzleIsSkipped(self) -> None:
+        text = "\n".join([
+            'title "one"', "width 2", "height 2",
+            "rows", "1", "x",
+            "columns", "1", "1",
+            'title "two"', "width 2", "height 2",
+            "rows", "2", "0",
+            "columns", "1", "1",
+        ])
+        puzzles = list(readNon(io.StringIO(text)))
+        self.assertEqual(len(puzzles), 2)
+        self.assertEqual(puzzles[0][:2], (0, "one"))
+        self.assertIsInstance(puzzles[0][2], ValueError)
+        self.assertEqual(puzzles[1], (1, "two", [[2], [0]], [[1], [1]]))
+
+if __name__ == "__main__":
+    board1 = Engine.solveBoard(TESTROWS, TESTCOLS, SOLUTION)
+    board2 = Engine.solveBoard(TESTROWS, TESTCOLS, COUNTERBOARD)
+    Engine.printBoard(board1)
+    print("-----")
+    Engine.printBoard(board2)
+    print(Engine.boardIsSolvable(TESTROWS, TESTCOLS, COUNTERBOARD))
\ No newline at end of file